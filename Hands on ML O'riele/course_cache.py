@@ -0,0 +1,128 @@
+"""
+Online Courses Dataset - Columnar Cache of the Cleaned Frame
+File: course_cache.py
+Purpose: Store the cleaned course frame as an uncompressed Feather file
+         keyed by a fingerprint of the source CSV, so later runs (and
+         downstream jobs) memory-map it instead of re-parsing the CSV.
+
+Requires pyarrow. Without it every lookup is a miss and nothing is
+written, so the EDA script simply falls back to the full STEP 1-9 path.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from course_cleaning import COURSE_RULES
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+
+# Bump when the cleaning logic changes in a way COURSE_RULES doesn't show
+CACHE_VERSION = "1"
+CACHE_DIR_NAME = ".course_cache"
+SAMPLE_BYTES = 64 * 1024
+KEY_HEX_CHARS = 32
+CATEGORICAL_COLUMNS = ['Category', 'Sub-Category', 'Site', 'Course Type']
+METADATA_KEY = b'course_eda'
+
+
+def source_fingerprint(file_path, sample_bytes=SAMPLE_BYTES):
+    """
+    Cheap content fingerprint of a (possibly multi-GB) source file.
+
+    Hashes the size, the mtime and a sample from the start, middle and end
+    of the file, plus the cleaning rules, so editing the data or the rules
+    both invalidate the cache.
+
+    Args:
+        file_path (str): Path to the source CSV
+        sample_bytes (int): Bytes read at each sample point
+
+    Returns:
+        str: Hex digest
+    """
+    st = os.stat(file_path)
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_VERSION}|{st.st_size}|{st.st_mtime_ns}|{COURSE_RULES!r}".encode())
+    with open(file_path, 'rb') as f:
+        for offset in (0, st.st_size // 2, max(st.st_size - sample_bytes, 0)):
+            f.seek(offset)
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def cache_path(file_path):
+    """Where the cache for ``file_path`` lives in its current state."""
+    source = Path(file_path)
+    key = source_fingerprint(source)[:KEY_HEX_CHARS]
+    return source.parent / CACHE_DIR_NAME / f"{source.stem}-{key}.feather"
+
+
+def load_cleaned(file_path):
+    """
+    Memory-map the cached cleaned frame for ``file_path``.
+
+    Args:
+        file_path (str): Path to the source CSV
+
+    Returns:
+        tuple: (pd.DataFrame, dict of run stats), or (None, None) on a miss
+    """
+    if feather is None or not os.path.exists(file_path):
+        return None, None
+    path = cache_path(file_path)
+    if not path.exists():
+        return None, None
+    table = feather.read_table(path, memory_map=True)
+    stats = json.loads(table.schema.metadata.get(METADATA_KEY, b'{}'))
+    return table.to_pandas(), stats
+
+
+def store_cleaned(file_path, df_clean, stats=None):
+    """
+    Write the cleaned frame to the cache and drop stale entries for the
+    same source.
+
+    Args:
+        file_path (str): Path to the source CSV the frame was built from
+        df_clean (pd.DataFrame): Cleaned frame
+        stats (dict): JSON-serializable run stats to keep alongside it
+
+    Returns:
+        Path: The cache file, or None if pyarrow is unavailable
+    """
+    if feather is None:
+        return None
+    path = cache_path(file_path)
+    path.parent.mkdir(exist_ok=True)
+
+    frame = df_clean.reset_index(drop=True)
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype('category')
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(stats or {}).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Uncompressed so the file can be memory-mapped without decoding
+    tmp_path = path.with_suffix('.tmp')
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+    # Only this source's entries: a glob on "{stem}-*" would also match
+    # the caches of e.g. courses-2024.csv when cleaning courses.csv
+    own = re.compile(rf"{re.escape(Path(file_path).stem)}-[0-9a-f]{{{KEY_HEX_CHARS}}}\.feather")
+    for stale in path.parent.iterdir():
+        if stale != path and own.fullmatch(stale.name):
+            stale.unlink()
+    return path
@@ -0,0 +1,449 @@
+"""
+Online Courses Dataset - Streaming (out-of-core) EDA
+File: course_stream.py
+Purpose: Compute the EDA statistics of STEP 4-8 chunk by chunk so that
+         peak memory is bounded by the chunk size, not the file size.
+
+Every accumulator below is mergeable: two accumulators built over
+different parts of the file can be combined with ``merge`` and give the
+same answer as one accumulator that saw both parts.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """
+    Small mergeable quantile sketch (KLL-style compactor hierarchy).
+
+    Level ``i`` holds items that each stand for ``2**i`` original values.
+    When a level grows past ``k`` items it is sorted and every other item
+    is promoted to the next level, so memory stays at O(k log(n/k)).
+    """
+
+    def __init__(self, k=2048, seed=0):
+        self.k = k
+        self.count = 0
+        self._levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Add a batch of values (NaNs are ignored).
+
+        Args:
+            values (array-like): Numeric values from one chunk
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.size > self.k:
+                items = np.sort(items)
+                # An odd item out stays behind so no weight is lost
+                even = items.size - items.size % 2
+                offset = int(self._rng.integers(2))
+                promoted = items[:even][offset::2]
+                self._levels[level] = items[even:]
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs):
+        """
+        Approximate quantiles of everything seen so far.
+
+        Args:
+            qs (list[float]): Quantiles in [0, 1]
+
+        Returns:
+            list[float]: One value per requested quantile (NaN if empty)
+        """
+        if self.count == 0:
+            return [math.nan for _ in qs]
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(items.size, 2 ** level, dtype=np.float64)
+            for level, items in enumerate(self._levels)
+        ])
+        order = np.argsort(values, kind='stable')
+        values, cum_weights = values[order], np.cumsum(weights[order])
+        total = cum_weights[-1]
+        positions = np.searchsorted(cum_weights, np.asarray(qs) * total, side='left')
+        positions = np.clip(positions, 0, values.size - 1)
+        return values[positions].tolist()
+
+
+class NumericAccumulator:
+    """
+    Running count/min/max/mean/std (Chan et al. parallel update) plus a
+    quantile sketch for the median and quartiles.
+    """
+
+    def __init__(self, sketch_k=2048):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(k=sketch_k)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        other = NumericAccumulator(sketch_k=self.sketch.k)
+        other.count = values.size
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self._merge_moments(other)
+        self.sketch.update(values)
+
+    def merge(self, other):
+        self._merge_moments(other)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def _merge_moments(self, other):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        # Sample standard deviation, same as pandas' default (ddof=1)
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    def describe(self):
+        q25, q50, q75 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        return pd.Series({
+            'count': float(self.count),
+            'mean': self.mean if self.count else math.nan,
+            'std': self.std,
+            'min': self.min if self.count else math.nan,
+            '25%': q25,
+            '50%': q50,
+            '75%': q75,
+            'max': self.max if self.count else math.nan,
+        })
+
+
+class CategoricalAccumulator:
+    """
+    Exact value counts for a text column, capped at ``max_tracked``
+    distinct values so a free-text column cannot grow without bound.
+    Once the cap is hit, new values are no longer tracked and the unique
+    count becomes a lower bound.
+    """
+
+    def __init__(self, max_tracked=100_000):
+        self.max_tracked = max_tracked
+        self.count = 0
+        self.counts = {}
+        self.truncated = False
+
+    def update(self, values):
+        counts = values.value_counts(dropna=True)
+        self.count += int(counts.sum())
+        self._add_counts(counts.items())
+
+    def merge(self, other):
+        self.count += other.count
+        self.truncated = self.truncated or other.truncated
+        self._add_counts(other.counts.items())
+        return self
+
+    def _add_counts(self, items):
+        tracked = self.counts
+        for value, n in items:
+            if value in tracked:
+                tracked[value] += int(n)
+            elif len(tracked) < self.max_tracked:
+                tracked[value] = int(n)
+            else:
+                self.truncated = True
+
+    @property
+    def nunique(self):
+        return len(self.counts)
+
+    def value_counts(self):
+        return pd.Series(self.counts, dtype='int64').sort_values(ascending=False, kind='stable')
+
+    def describe(self):
+        top = self.value_counts().head(1)
+        return pd.Series({
+            'count': self.count,
+            'unique': self.nunique,
+            'top': top.index[0] if len(top) else np.nan,
+            'freq': int(top.iloc[0]) if len(top) else np.nan,
+        })
+
+
+class DuplicateTracker:
+    """
+    Counts duplicate rows using a set of 64-bit row fingerprints instead
+    of keeping the rows themselves.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.duplicates = 0
+
+    def update(self, chunk):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        seen = self.seen
+        for h in hashes.tolist():
+            if h in seen:
+                self.duplicates += 1
+            else:
+                seen.add(h)
+
+    def merge(self, other):
+        self.duplicates += other.duplicates + len(self.seen & other.seen)
+        self.seen |= other.seen
+        return self
+
+
+class StreamProfile:
+    """
+    All STEP 4-8 statistics for one CSV, built up chunk by chunk.
+
+    Column kinds (numeric vs. text) are fixed from the first chunk; later
+    chunks are coerced to the same kind so that a stray string in a
+    numeric column counts as missing instead of changing the schema.
+    """
+
+    def __init__(self, sketch_k=2048, max_tracked=100_000):
+        self.sketch_k = sketch_k
+        self.max_tracked = max_tracked
+        self.rows = 0
+        self.chunks = 0
+        self.columns = None
+        self.dtypes = None
+        self.missing = None
+        self.numeric = {}
+        self.categorical = {}
+        self.duplicates = DuplicateTracker()
+        self.head = None
+        self.tail = None
+
+    def _init_schema(self, chunk):
+        self.columns = list(chunk.columns)
+        self.dtypes = chunk.dtypes
+        self.missing = pd.Series(0, index=self.columns, dtype='int64')
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            self.numeric[col] = NumericAccumulator(sketch_k=self.sketch_k)
+        for col in chunk.select_dtypes(include=['object', 'string']).columns:
+            self.categorical[col] = CategoricalAccumulator(max_tracked=self.max_tracked)
+        self.head = chunk.head()
+
+    def update(self, chunk):
+        """
+        Fold one DataFrame chunk into the profile.
+
+        Args:
+            chunk (pd.DataFrame): Rows from the source file
+        """
+        if self.columns is None:
+            self._init_schema(chunk)
+        self.rows += len(chunk)
+        self.chunks += 1
+        self.missing += chunk.isnull().sum().reindex(self.columns, fill_value=0)
+
+        for col, acc in self.numeric.items():
+            values = chunk[col]
+            if values.dtype == object:
+                values = pd.to_numeric(values, errors='coerce')
+                chunk = chunk.assign(**{col: values})
+            acc.update(values.to_numpy(dtype=np.float64, na_value=np.nan))
+        for col, acc in self.categorical.items():
+            acc.update(chunk[col])
+
+        # Hash numeric columns as float64 so an int chunk and a float chunk
+        # produce the same fingerprint for the same row
+        numeric_cols = list(self.numeric)
+        if numeric_cols:
+            chunk = chunk.astype({col: 'float64' for col in numeric_cols})
+        self.duplicates.update(chunk)
+        self.tail = chunk.tail()
+
+    def merge(self, other):
+        """Combine with a profile built over a later part of the same file."""
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._init_schema(other.head)
+        self.rows += other.rows
+        self.chunks += other.chunks
+        self.missing += other.missing
+        for col, acc in other.numeric.items():
+            self.numeric[col].merge(acc)
+        for col, acc in other.categorical.items():
+            self.categorical[col].merge(acc)
+        self.duplicates.merge(other.duplicates)
+        self.tail = other.tail
+        return self
+
+    @classmethod
+    def from_csv(cls, file_path, chunksize=100_000, **read_csv_kwargs):
+        """
+        Build a profile by streaming a CSV file.
+
+        Args:
+            file_path (str): Path to the CSV file
+            chunksize (int): Rows per chunk; this sets the peak memory
+
+        Returns:
+            StreamProfile: The filled-in profile
+        """
+        profile = cls()
+        with pd.read_csv(file_path, chunksize=chunksize, **read_csv_kwargs) as reader:
+            for chunk in reader:
+                profile.update(chunk)
+        return profile
+
+    def missing_table(self):
+        missing_data = pd.DataFrame({
+            'Column': self.columns,
+            'Missing_Count': self.missing.values,
+            'Missing_Percentage': (self.missing.values / max(self.rows, 1) * 100).round(2)
+        })
+        return missing_data[missing_data['Missing_Count'] > 0].sort_values('Missing_Count', ascending=False)
+
+    def describe_numeric(self):
+        return pd.DataFrame({col: acc.describe() for col, acc in self.numeric.items()})
+
+    def describe_categorical(self):
+        return pd.DataFrame({col: acc.describe() for col, acc in self.categorical.items()})
+
+
+def run_streaming_eda(file_path, chunksize=100_000):
+    """
+    Print STEP 1-8 of the EDA report without loading the whole file.
+
+    Args:
+        file_path (str): Path to the CSV file
+        chunksize (int): Rows per chunk
+
+    Returns:
+        StreamProfile: The profile the report was printed from
+    """
+    print("\n" + "="*80)
+    print("STEP 1: DATA LOADING (STREAMING)")
+    print("="*80)
+
+    profile = StreamProfile.from_csv(file_path, chunksize=chunksize, encoding='utf-8')
+    print(f"✓ Data streamed successfully in {profile.chunks} chunks of up to {chunksize:,} rows")
+    print(f"  - Shape: {profile.rows} rows × {len(profile.columns)} columns")
+
+    print("\n" + "="*80)
+    print("STEP 2: DATA COLUMNS IDENTIFICATION")
+    print("="*80)
+
+    print(f"\nTotal Columns: {len(profile.columns)}\n")
+    print("Column Names and Data Types:")
+    print("-" * 80)
+    for idx, (col, dtype) in enumerate(zip(profile.columns, profile.dtypes), 1):
+        print(f"{idx:3d}. {col:40s} | {str(dtype):15s}")
+
+    print("\n" + "="*80)
+    print("STEP 3: BASIC DATASET INFORMATION")
+    print("="*80)
+
+    print("\nFirst 5 Rows:")
+    print(profile.head)
+
+    print("\nLast 5 Rows:")
+    print(profile.tail)
+
+    print("\n" + "="*80)
+    print("STEP 4: MISSING VALUES ANALYSIS")
+    print("="*80)
+
+    missing_data = profile.missing_table()
+    if len(missing_data) > 0:
+        print(f"\nColumns with Missing Values: {len(missing_data)}")
+        print("-" * 80)
+        print(missing_data.to_string(index=False))
+    else:
+        print("\n✓ No missing values found!")
+
+    print("\n" + "="*80)
+    print("STEP 5: DUPLICATE RECORDS ANALYSIS")
+    print("="*80)
+
+    duplicates = profile.duplicates.duplicates
+    print(f"\nTotal Duplicate Rows: {duplicates}")
+    if duplicates > 0:
+        print(f"  - Percentage: {(duplicates/profile.rows*100):.2f}%")
+
+    print("\n" + "="*80)
+    print("STEP 6: STATISTICAL SUMMARY")
+    print("="*80)
+
+    print("\nNumerical Columns Summary (quartiles are approximate):")
+    print(profile.describe_numeric())
+
+    print("\nCategorical Columns Summary:")
+    print(profile.describe_categorical())
+
+    print("\n" + "="*80)
+    print("STEP 7: CATEGORICAL COLUMNS ANALYSIS")
+    print("="*80)
+
+    for col in list(profile.categorical)[:10]:  # Show first 10 categorical columns
+        acc = profile.categorical[col]
+        bound = "at least " if acc.truncated else ""
+        print(f"\n{col}:")
+        print(f"  - Unique values: {bound}{acc.nunique}")
+        if acc.nunique <= 20:
+            print(f"  - Value counts:")
+            print(acc.value_counts().head(10))
+
+    print("\n" + "="*80)
+    print("STEP 8: NUMERICAL COLUMNS ANALYSIS")
+    print("="*80)
+
+    print(f"\nNumerical Columns: {list(profile.numeric)}")
+    for col, acc in profile.numeric.items():
+        median, = acc.sketch.quantiles([0.5])
+        print(f"\n{col}:")
+        print(f"  - Min: {acc.min}")
+        print(f"  - Max: {acc.max}")
+        print(f"  - Mean: {acc.mean:.2f}")
+        print(f"  - Median (approx.): {median:.2f}")
+        print(f"  - Std Dev: {acc.std:.2f}")
+
+    return profile
@@ -0,0 +1,336 @@
+"""
+Memory-Mapped Binary Loader for Numeric CSVs (magic04.data and friends)
+File: numeric_memmap.py
+Purpose: Parse a "features..., label" text file once, then open it zero-copy
+
+magic04.data is 19,020 rows of 10 float features and a g/h class label
+with no header line. The notebooks re-parse it as text on every run; this
+module converts it once into:
+
+    [64-byte aligned header][float32 features, rows x cols][uint8 labels]
+
+and opens that with np.memmap, so "loading" is an mmap call and pages are
+only read when a mini-batch touches them.
+
+- convert():      parallel chunked text parser -> binary file
+- open_dataset(): zero-copy MemmapDataset (features, labels, classes)
+- load():         open the binary file, converting first if it's missing
+                  or older than the source
+- MemmapDataset.iter_batches(): streaming mini-batches for training loops
+
+Usage:
+    python numeric_memmap.py convert magic04.data
+    python numeric_memmap.py bench --scale 50
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MAGIC = b"NUMMMAP1"
+ALIGN = 64
+CHUNK_BYTES = 4 * 1024 * 1024
+
+MAGIC04_COLUMNS = ["fLength", "fWidth", "fSize", "fConc", "fConc1",
+                   "fAsym", "fM3Long", "fM3Trans", "fAlpha", "fDist"]
+
+
+# ============================================================================
+# Parsing
+# ============================================================================
+
+def _chunk_bounds(path, chunk_bytes):
+    """Split a file into byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    bounds, start = [], 0
+    with open(path, "rb") as f:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                end += len(f.readline())
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def parse_chunk(path, start, end, delimiter=","):
+    """
+    Parse rows in ``path[start:end]`` whose last field is a class label.
+
+    Returns:
+        tuple: (float32 features [rows, cols], label codes, label names)
+        where codes index into the chunk-local sorted names
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode()
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return np.empty((0, 0), np.float32), np.empty(0, np.int64), []
+
+    cut = [line.rindex(delimiter) for line in lines]
+    # np.fromstring's text mode parses all feature values in one C call
+    values = np.fromstring(
+        delimiter.join(line[:i] for line, i in zip(lines, cut)),
+        dtype=np.float32, sep=delimiter,
+    )
+    features = values.reshape(len(lines), -1)
+    names, codes = np.unique([line[i + 1:].strip() for line, i in zip(lines, cut)],
+                             return_inverse=True)
+    return features, codes, names.tolist()
+
+
+# ============================================================================
+# Binary file
+# ============================================================================
+
+def convert(src, dst=None, workers=None, chunk_bytes=CHUNK_BYTES, feature_names=None):
+    """
+    Convert a numeric text file with a trailing label column to the binary
+    format, parsing chunks in parallel.
+
+    Args:
+        src (str): Text file, one "f1,...,fn,label" row per line
+        dst (str): Output path (default: ``src`` + ".npmm")
+        workers (int): Parser processes (1 = parse in this process)
+        chunk_bytes (int): Bytes of text per parse task
+        feature_names (list): Column names to store in the header
+
+    Returns:
+        str: Path of the binary file
+    """
+    dst = dst or src + ".npmm"
+    workers = workers or os.cpu_count() or 1
+    bounds = _chunk_bounds(src, chunk_bytes)
+    starts, ends = zip(*bounds) if bounds else ((), ())
+    if workers > 1 and len(bounds) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(parse_chunk, [src] * len(bounds), starts, ends))
+    else:
+        parts = [parse_chunk(src, s, e) for s, e in bounds]
+    parts = [p for p in parts if len(p[1])]
+
+    # Chunk-local label codes -> one global, sorted class list
+    classes = sorted({name for _, _, names in parts for name in names})
+    if len(classes) > 256:
+        raise ValueError(f"{len(classes)} distinct labels don't fit in uint8")
+    lookup = {name: i for i, name in enumerate(classes)}
+
+    n_rows = sum(len(codes) for _, codes, _ in parts)
+    n_features = parts[0][0].shape[1] if parts else 0
+    st = os.stat(src)
+    header = {
+        "n_rows": n_rows,
+        "n_features": n_features,
+        "feature_dtype": "float32",
+        "label_dtype": "uint8",
+        "classes": classes,
+        "feature_names": feature_names or [f"f{i}" for i in range(n_features)],
+        "source": {"path": os.path.basename(src), "size": st.st_size, "mtime_ns": st.st_mtime_ns},
+    }
+    header_bytes = json.dumps(header).encode()
+    # Features start on a 64-byte boundary so the memmap is aligned
+    data_offset = -(-(len(MAGIC) + 4 + len(header_bytes)) // ALIGN) * ALIGN
+
+    tmp = dst + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(4, "little"))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_offset - f.tell()))
+        for features, _, _ in parts:
+            np.ascontiguousarray(features, dtype="<f4").tofile(f)
+        for _, codes, names in parts:
+            remap = np.array([lookup[name] for name in names], dtype=np.uint8)
+            remap[codes].tofile(f)
+    os.replace(tmp, dst)
+    return dst
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a numeric memmap file")
+        header_len = int.from_bytes(f.read(4), "little")
+        header = json.loads(f.read(header_len))
+    header["data_offset"] = -(-(len(MAGIC) + 4 + header_len) // ALIGN) * ALIGN
+    return header
+
+
+class MemmapDataset:
+    """
+    Zero-copy view of a converted file.
+
+    Attributes:
+        features (np.memmap): float32 [n_rows, n_features], read-only
+        labels (np.memmap): uint8 [n_rows], codes into ``classes``
+        classes (list): Label names, e.g. ["g", "h"]
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = _read_header(path)
+        rows, cols = self.header["n_rows"], self.header["n_features"]
+        offset = self.header["data_offset"]
+        self.features = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(rows, cols))
+        self.labels = np.memmap(path, dtype=np.uint8, mode="r",
+                                offset=offset + rows * cols * 4, shape=(rows,))
+        self.classes = self.header["classes"]
+        self.feature_names = self.header["feature_names"]
+
+    def __len__(self):
+        return self.header["n_rows"]
+
+    def iter_batches(self, batch_size=256, shuffle=False, seed=None, drop_last=False):
+        """
+        Yield (features, labels) mini-batches.
+
+        Without shuffling each batch is a zero-copy slice of the memmap; with
+        it, rows are gathered in a random order (one copy per batch only).
+        """
+        n = len(self)
+        order = np.random.default_rng(seed).permutation(n) if shuffle else None
+        stop = n - n % batch_size if drop_last else n
+        for start in range(0, stop, batch_size):
+            end = min(start + batch_size, n)
+            if order is None:
+                yield self.features[start:end], self.labels[start:end]
+            else:
+                # Sorted gather reads the file front to back within a batch
+                idx = np.sort(order[start:end])
+                yield self.features[idx], self.labels[idx]
+
+    def to_frame(self, label_column="class"):
+        """pandas DataFrame copy (decoded labels), for notebook use."""
+        import pandas as pd
+        df = pd.DataFrame(np.asarray(self.features), columns=self.feature_names)
+        df[label_column] = np.asarray(self.classes)[self.labels]
+        return df
+
+
+def open_dataset(path):
+    return MemmapDataset(path)
+
+
+def load(src, dst=None, **convert_options):
+    """
+    Open the binary version of ``src``, (re)converting it first if it is
+    missing or was built from a different version of the source file.
+    """
+    dst = dst or src + ".npmm"
+    st = os.stat(src)
+    try:
+        source = _read_header(dst)["source"]
+        fresh = source["size"] == st.st_size and source["mtime_ns"] == st.st_mtime_ns
+    except (OSError, ValueError, KeyError):
+        fresh = False
+    if not fresh:
+        convert(src, dst, **convert_options)
+    return MemmapDataset(dst)
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+_PROBE = r"""
+import os, sys, time
+sys.path.insert(0, {here!r})
+import numpy as np, pandas as pd
+import numeric_memmap as nm
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+before = rss_mb()
+start = time.perf_counter()
+if {mode!r} == "read_csv":
+    df = pd.read_csv({src!r}, header=None)
+    X = df.iloc[:, :-1].to_numpy(np.float32)
+    y = df.iloc[:, -1].astype("category").cat.codes.to_numpy()
+elif {mode!r} == "memmap":
+    ds = nm.open_dataset({dst!r})
+    X, y = ds.features, ds.labels
+else:
+    ds = nm.open_dataset({dst!r})
+    total = 0.0
+    for X, y in ds.iter_batches(4096):
+        total += float(X.sum())
+elapsed = time.perf_counter() - start
+print(elapsed, rss_mb() - before)
+"""
+
+
+def _probe(mode, src, dst):
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = _PROBE.format(here=here, mode=mode, src=src, dst=dst)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    elapsed, rss = map(float, out.stdout.split())
+    return elapsed, rss
+
+
+def benchmark(src, scale, workers, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        if scale > 1:
+            data = open(src, "rb").read()
+            src = os.path.join(tmp, "scaled.data")
+            with open(src, "wb") as f:
+                for _ in range(scale):
+                    f.write(data)
+        dst = os.path.join(tmp, "data.npmm")
+
+        print("=" * 70)
+        print(f"NUMERIC MEMMAP BENCHMARK ({os.path.getsize(src) / 2**20:.1f} MB text, "
+              f"{workers} parser workers)")
+        print("=" * 70)
+        for label, w in [("convert (1 worker)", 1), (f"convert ({workers} workers)", workers)]:
+            start = time.perf_counter()
+            convert(src, dst, workers=w, chunk_bytes=1 << 20)
+            print(f"{label:24s} {time.perf_counter() - start:8.3f}s")
+        ds = open_dataset(dst)
+        print(f"binary file: {os.path.getsize(dst) / 2**20:.1f} MB, "
+              f"{len(ds):,} rows x {ds.header['n_features']} features, classes {ds.classes}")
+
+        print(f"\n{'load path':24s} {'median s':>10s} {'RSS +MB':>10s}")
+        print("-" * 46)
+        for mode, label in [("read_csv", "pd.read_csv"), ("memmap", "np.memmap open"),
+                            ("batches", "memmap + full batch pass")]:
+            runs = [_probe(mode, src, dst) for _ in range(repeat)]
+            runs.sort()
+            elapsed, rss = runs[len(runs) // 2]
+            print(f"{label:24s} {elapsed:10.4f} {rss:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped loader for numeric CSVs")
+    parser.add_argument("command", choices=["convert", "bench"])
+    parser.add_argument("source", nargs="?",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "magic04.data"))
+    parser.add_argument("-o", "--output")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--scale", type=int, default=20, help="bench: repeat the source N times")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        names = MAGIC04_COLUMNS if os.path.basename(args.source) == "magic04.data" else None
+        start = time.perf_counter()
+        dst = convert(args.source, args.output, workers=args.workers, feature_names=names)
+        ds = open_dataset(dst)
+        print(f"✓ {len(ds):,} rows x {ds.header['n_features']} features -> {dst} "
+              f"in {time.perf_counter() - start:.3f}s (classes {ds.classes})")
+    else:
+        benchmark(args.source, args.scale, args.workers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
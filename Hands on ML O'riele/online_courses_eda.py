@@ -5,11 +5,18 @@ File: online_courses_eda.py
 Purpose: Comprehensive exploratory data analysis and data cleaning
 """
 
+import argparse
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from course_cleaning import CleaningEngine, COURSE_RULES
+from course_cache import load_cleaned, store_cleaned
+from course_profile import profile_frame, write_report
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,6 +25,17 @@ pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', 100)
 pd.set_option('display.width', None)
 
+parser = argparse.ArgumentParser(description="Online courses EDA and data cleaning")
+parser.add_argument('--stream', action='store_true',
+                    help="Stream the CSV in chunks and only run STEP 1-8 (bounded memory)")
+parser.add_argument('--chunksize', type=int, default=100_000,
+                    help="Rows per chunk in --stream mode")
+parser.add_argument('--no-cache', action='store_true',
+                    help="Ignore the cleaned-data cache and rerun STEP 1-9")
+parser.add_argument('--report', metavar='PATH',
+                    help="Also write every column's STEP 6-8 statistics to a .json or .html report")
+args = parser.parse_args()
+
 # File path
 file_path = '/Users/apple/Downloads/ML & AI/Book-Reviews-and-Summaries/Hands on ML O\'riele/Online_Courses.csv'
 
@@ -26,200 +44,213 @@ print("ONLINE COURSES DATASET - EXPLORATORY DATA ANALYSIS & DATA CLEANING")
 print("="*80)
 print(f"\nAnalysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-# ============================================================================
-# STEP 1: DATA LOADING
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 1: DATA LOADING")
-print("="*80)
-
-try:
-    df = pd.read_csv(file_path, encoding='utf-8')
-    print(f"✓ Data loaded successfully!")
-    print(f"  - Shape: {df.shape[0]} rows × {df.shape[1]} columns")
-except Exception as e:
-    print(f"✗ Error loading data: {e}")
-    exit(1)
-
-# ============================================================================
-# STEP 2: COLUMN IDENTIFICATION
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 2: DATA COLUMNS IDENTIFICATION")
-print("="*80)
-
-print(f"\nTotal Columns: {len(df.columns)}\n")
-print("Column Names and Data Types:")
-print("-" * 80)
-for idx, (col, dtype) in enumerate(zip(df.columns, df.dtypes), 1):
-    print(f"{idx:3d}. {col:40s} | {str(dtype):15s}")
-
-# ============================================================================
-# STEP 3: BASIC INFORMATION
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 3: BASIC DATASET INFORMATION")
-print("="*80)
-
-print("\nDataset Info:")
-df.info()
-
-print("\nFirst 5 Rows:")
-print(df.head())
-
-print("\nLast 5 Rows:")
-print(df.tail())
-
-# ============================================================================
-# STEP 4: MISSING VALUES ANALYSIS
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 4: MISSING VALUES ANALYSIS")
-print("="*80)
-
-missing_data = pd.DataFrame({
-    'Column': df.columns,
-    'Missing_Count': df.isnull().sum(),
-    'Missing_Percentage': (df.isnull().sum() / len(df) * 100).round(2)
-})
-missing_data = missing_data[missing_data['Missing_Count'] > 0].sort_values('Missing_Count', ascending=False)
-
-if len(missing_data) > 0:
-    print(f"\nColumns with Missing Values: {len(missing_data)}")
+if args.stream:
+    # Out-of-core mode: STEP 1-8 from mergeable per-chunk accumulators, so
+    # peak memory follows --chunksize instead of the file size. STEP 9-12
+    # need the whole frame in memory and are skipped.
+    from course_stream import run_streaming_eda
+    run_streaming_eda(file_path, chunksize=args.chunksize)
+    print("\n" + "="*80)
+    print("STREAMING ANALYSIS COMPLETE! (run without --stream for STEP 9-12)")
+    print("="*80)
+    sys.exit(0)
+
+# Warm start: an unchanged source has its cleaned frame cached as Feather,
+# so it is memory-mapped and STEP 1-9 are skipped entirely
+df_clean, run_stats = (None, None) if args.no_cache else load_cleaned(file_path)
+from_cache = df_clean is not None
+if from_cache:
+    print("✓ Source unchanged since last run - loaded cleaned data from cache, skipping STEP 1-9")
+    print(f"  - Shape: {df_clean.shape[0]} rows × {df_clean.shape[1]} columns")
+
+if not from_cache:
+    # ============================================================================
+    # STEP 1: DATA LOADING
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 1: DATA LOADING")
+    print("="*80)
+
+    try:
+        df = pd.read_csv(file_path, encoding='utf-8')
+        print(f"✓ Data loaded successfully!")
+        print(f"  - Shape: {df.shape[0]} rows × {df.shape[1]} columns")
+    except Exception as e:
+        print(f"✗ Error loading data: {e}")
+        exit(1)
+
+    # ============================================================================
+    # STEP 2: COLUMN IDENTIFICATION
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 2: DATA COLUMNS IDENTIFICATION")
+    print("="*80)
+
+    print(f"\nTotal Columns: {len(df.columns)}\n")
+    print("Column Names and Data Types:")
+    print("-" * 80)
+    for idx, (col, dtype) in enumerate(zip(df.columns, df.dtypes), 1):
+        print(f"{idx:3d}. {col:40s} | {str(dtype):15s}")
+
+    # ============================================================================
+    # STEP 3: BASIC INFORMATION
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 3: BASIC DATASET INFORMATION")
+    print("="*80)
+
+    print("\nDataset Info:")
+    df.info()
+
+    print("\nFirst 5 Rows:")
+    print(df.head())
+
+    print("\nLast 5 Rows:")
+    print(df.tail())
+
+    # ============================================================================
+    # STEP 4: MISSING VALUES ANALYSIS
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 4: MISSING VALUES ANALYSIS")
+    print("="*80)
+
+    missing_data = pd.DataFrame({
+        'Column': df.columns,
+        'Missing_Count': df.isnull().sum(),
+        'Missing_Percentage': (df.isnull().sum() / len(df) * 100).round(2)
+    })
+    missing_data = missing_data[missing_data['Missing_Count'] > 0].sort_values('Missing_Count', ascending=False)
+
+    if len(missing_data) > 0:
+        print(f"\nColumns with Missing Values: {len(missing_data)}")
+        print("-" * 80)
+        print(missing_data.to_string(index=False))
+    else:
+        print("\n✓ No missing values found!")
+
+    # ============================================================================
+    # STEP 5: DUPLICATE ANALYSIS
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 5: DUPLICATE RECORDS ANALYSIS")
+    print("="*80)
+
+    duplicates = df.duplicated().sum()
+    print(f"\nTotal Duplicate Rows: {duplicates}")
+
+    if duplicates > 0:
+        print(f"  - Percentage: {(duplicates/len(df)*100):.2f}%")
+        print("\nDuplicate rows:")
+        print(df[df.duplicated(keep=False)])
+
+    # ============================================================================
+    # STEP 6: STATISTICAL SUMMARY
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 6: STATISTICAL SUMMARY")
+    print("="*80)
+
+    print("\nNumerical Columns Summary:")
+    print(df.describe())
+
+    print("\nCategorical Columns Summary:")
+    print(df.describe(include=['object']))
+
+    # ============================================================================
+    # STEP 7: CATEGORICAL COLUMNS ANALYSIS
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 7: CATEGORICAL COLUMNS ANALYSIS")
+    print("="*80)
+
+    categorical_cols = df.select_dtypes(include=['object']).columns
+
+    for col in categorical_cols[:10]:  # Show first 10 categorical columns
+        unique_count = df[col].nunique()
+        print(f"\n{col}:")
+        print(f"  - Unique values: {unique_count}")
+        if unique_count <= 20:
+            print(f"  - Value counts:")
+            print(df[col].value_counts().head(10))
+
+    # ============================================================================
+    # STEP 8: NUMERICAL COLUMNS ANALYSIS
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 8: NUMERICAL COLUMNS ANALYSIS")
+    print("="*80)
+
+    numerical_cols = df.select_dtypes(include=[np.number]).columns
+    print(f"\nNumerical Columns: {list(numerical_cols)}")
+
+    for col in numerical_cols:
+        print(f"\n{col}:")
+        print(f"  - Min: {df[col].min()}")
+        print(f"  - Max: {df[col].max()}")
+        print(f"  - Mean: {df[col].mean():.2f}")
+        print(f"  - Median: {df[col].median():.2f}")
+        print(f"  - Std Dev: {df[col].std():.2f}")
+
+    if args.report:
+        # This script has no __main__ guard, so the profiler runs in-process
+        # here; use `python course_profile.py <csv>` for the process pool.
+        profile_report = profile_frame(df, workers=1)
+        print(f"\n✓ Column profile report saved to: {write_report(profile_report, args.report)}")
+
+    # ============================================================================
+    # STEP 9: DATA CLEANING
+    # ============================================================================
+    print("\n" + "="*80)
+    print("STEP 9: DATA CLEANING")
+    print("="*80)
+
+    # Create a copy for cleaning
+    df_clean = df.copy()
+
+    print("\nCleaning Steps:")
     print("-" * 80)
-    print(missing_data.to_string(index=False))
-else:
-    print("\n✓ No missing values found!")
-
-# ============================================================================
-# STEP 5: DUPLICATE ANALYSIS
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 5: DUPLICATE RECORDS ANALYSIS")
-print("="*80)
-
-duplicates = df.duplicated().sum()
-print(f"\nTotal Duplicate Rows: {duplicates}")
-
-if duplicates > 0:
-    print(f"  - Percentage: {(duplicates/len(df)*100):.2f}%")
-    print("\nDuplicate rows:")
-    print(df[df.duplicated(keep=False)])
-
-# ============================================================================
-# STEP 6: STATISTICAL SUMMARY
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 6: STATISTICAL SUMMARY")
-print("="*80)
-
-print("\nNumerical Columns Summary:")
-print(df.describe())
-
-print("\nCategorical Columns Summary:")
-print(df.describe(include=['object']))
-
-# ============================================================================
-# STEP 7: CATEGORICAL COLUMNS ANALYSIS
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 7: CATEGORICAL COLUMNS ANALYSIS")
-print("="*80)
-
-categorical_cols = df.select_dtypes(include=['object']).columns
-
-for col in categorical_cols[:10]:  # Show first 10 categorical columns
-    unique_count = df[col].nunique()
-    print(f"\n{col}:")
-    print(f"  - Unique values: {unique_count}")
-    if unique_count <= 20:
-        print(f"  - Value counts:")
-        print(df[col].value_counts().head(10))
-
-# ============================================================================
-# STEP 8: NUMERICAL COLUMNS ANALYSIS
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 8: NUMERICAL COLUMNS ANALYSIS")
-print("="*80)
-
-numerical_cols = df.select_dtypes(include=[np.number]).columns
-print(f"\nNumerical Columns: {list(numerical_cols)}")
-
-for col in numerical_cols:
-    print(f"\n{col}:")
-    print(f"  - Min: {df[col].min()}")
-    print(f"  - Max: {df[col].max()}")
-    print(f"  - Mean: {df[col].mean():.2f}")
-    print(f"  - Median: {df[col].median():.2f}")
-    print(f"  - Std Dev: {df[col].std():.2f}")
-
-# ============================================================================
-# STEP 9: DATA CLEANING
-# ============================================================================
-print("\n" + "="*80)
-print("STEP 9: DATA CLEANING")
-print("="*80)
 
-# Create a copy for cleaning
-df_clean = df.copy()
-
-print("\nCleaning Steps:")
-print("-" * 80)
-
-# 1. Remove duplicates
-initial_rows = len(df_clean)
-df_clean = df_clean.drop_duplicates()
-removed_duplicates = initial_rows - len(df_clean)
-print(f"1. Removed {removed_duplicates} duplicate rows")
-
-# 2. Handle missing values in key columns
-# For this dataset, we'll identify key columns first
-key_columns = ['Title', 'Category', 'Sub-Category', 'Course Type', 'Site']
-
-for col in key_columns:
-    if col in df_clean.columns:
-        missing_before = df_clean[col].isnull().sum()
-        if missing_before > 0:
-            # For categorical, fill with 'Unknown'
-            df_clean[col].fillna('Unknown', inplace=True)
-            print(f"2. Filled {missing_before} missing values in '{col}' with 'Unknown'")
-
-# 3. Clean Rating column (extract numeric value)
-if 'Rating' in df_clean.columns:
-    print("\n3. Cleaning 'Rating' column:")
-    # Extract numeric rating from strings like "4.9stars"
-    df_clean['Rating_Numeric'] = df_clean['Rating'].str.extract(r'(\d+\.?\d*)')[0].astype(float)
-    print(f"   - Created 'Rating_Numeric' column")
-    print(f"   - Range: {df_clean['Rating_Numeric'].min()} to {df_clean['Rating_Numeric'].max()}")
-
-# 4. Clean Number of viewers column
-if 'Number of viewers' in df_clean.columns:
-    print("\n4. Cleaning 'Number of viewers' column:")
-    # Remove commas and convert to numeric with error handling
-    df_clean['Number_of_viewers_Numeric'] = pd.to_numeric(
-        df_clean['Number of viewers'].str.replace(',', '').str.replace(' ', '').str.extract(r'(\d+)')[0],
-        errors='coerce'
-    )
-    print(f"   - Created 'Number_of_viewers_Numeric' column")
-    valid_viewers = df_clean['Number_of_viewers_Numeric'].dropna()
-    if len(valid_viewers) > 0:
-        print(f"   - Range: {valid_viewers.min():.0f} to {valid_viewers.max():.0f}")
-        print(f"   - Valid values: {len(valid_viewers)}/{len(df_clean)}")
-
-# 5. Clean Duration column
-if 'Duration' in df_clean.columns:
-    print("\n5. Cleaning 'Duration' column:")
-    # Extract months from strings like "Approximately 3 months to complete"
-    df_clean['Duration_Months'] = pd.to_numeric(
-        df_clean['Duration'].str.extract(r'(\d+)\s*month')[0],
-        errors='coerce'
-    )
-    print(f"   - Created 'Duration_Months' column")
-    valid_duration = df_clean['Duration_Months'].dropna()
-    if len(valid_duration) > 0:
-        print(f"   - Range: {valid_duration.min():.0f} to {valid_duration.max():.0f} months")
-        print(f"   - Valid values: {len(valid_duration)}/{len(df_clean)}")
+    # 1. Remove duplicates
+    initial_rows = len(df_clean)
+    df_clean = df_clean.drop_duplicates()
+    removed_duplicates = initial_rows - len(df_clean)
+    print(f"1. Removed {removed_duplicates} duplicate rows")
+
+    # 2. Handle missing values in key columns
+    # For this dataset, we'll identify key columns first
+    key_columns = ['Title', 'Category', 'Sub-Category', 'Course Type', 'Site']
+
+    for col in key_columns:
+        if col in df_clean.columns:
+            missing_before = df_clean[col].isnull().sum()
+            if missing_before > 0:
+                # For categorical, fill with 'Unknown'
+                df_clean[col].fillna('Unknown', inplace=True)
+                print(f"2. Filled {missing_before} missing values in '{col}' with 'Unknown'")
+
+    # 3-5. Parse Rating, Number of viewers and Duration into typed columns.
+    # The engine factorizes each column once and parses only its distinct
+    # strings, instead of chaining several .str passes per column.
+    cleaning_reports = CleaningEngine(COURSE_RULES).apply(df_clean)
+
+    for step, report in enumerate(cleaning_reports, 3):
+        print(f"\n{step}. Cleaning '{report.source}' column:")
+        print(f"   - Created '{report.target}' column")
+        valid_values = df_clean[report.target].dropna()
+        if len(valid_values) > 0:
+            print(f"   - Range: {valid_values.min():g} to {valid_values.max():g}")
+            print(f"   - Valid values: {len(valid_values)}/{len(df_clean)}")
+        print(f"   - Parse failures: {report.failures} ({report.failure_rate:.2%} of non-missing)")
+
+    run_stats = {
+        'rows': int(df.shape[0]),
+        'columns': int(df.shape[1]),
+        'memory_mb': float(df.memory_usage(deep=True).sum() / 1024**2),
+        'duplicates': int(duplicates),
+        'missing_columns': int(len(missing_data)),
+        'total_missing': int(df.isnull().sum().sum()),
+    }
 
 # ============================================================================
 # STEP 10: SAVE CLEANED DATA
@@ -229,8 +260,13 @@ print("STEP 10: SAVE CLEANED DATA")
 print("="*80)
 
 output_file = '/Users/apple/Downloads/ML & AI/Book-Reviews-and-Summaries/Hands on ML O\'riele/Online_Courses_Cleaned.csv'
-df_clean.to_csv(output_file, index=False)
-print(f"\n✓ Cleaned data saved to: {output_file}")
+if not from_cache or not os.path.exists(output_file):
+    df_clean.to_csv(output_file, index=False)
+    print(f"\n✓ Cleaned data saved to: {output_file}")
+if not from_cache:
+    cache_file = store_cleaned(file_path, df_clean, run_stats)
+    if cache_file is not None:
+        print(f"✓ Columnar cache written to: {cache_file}")
 print(f"  - Final shape: {df_clean.shape[0]} rows × {df_clean.shape[1]} columns")
 
 # ============================================================================
@@ -300,19 +336,19 @@ ONLINE COURSES DATASET - ANALYSIS SUMMARY
 {'='*80}
 
 1. DATASET OVERVIEW
-   - Total Records: {df.shape[0]:,}
-   - Total Columns: {df.shape[1]}
-   - Memory Usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB
+   - Total Records: {run_stats['rows']:,}
+   - Total Columns: {run_stats['columns']}
+   - Memory Usage: {run_stats['memory_mb']:.2f} MB
 
 2. DATA QUALITY
-   - Duplicate Rows: {duplicates}
-   - Columns with Missing Values: {len(missing_data)}
-   - Total Missing Values: {df.isnull().sum().sum():,}
+   - Duplicate Rows: {run_stats['duplicates']}
+   - Columns with Missing Values: {run_stats['missing_columns']}
+   - Total Missing Values: {run_stats['total_missing']:,}
 
 3. CLEANED DATASET
    - Final Records: {df_clean.shape[0]:,}
    - Final Columns: {df_clean.shape[1]}
-   - Records Removed: {df.shape[0] - df_clean.shape[0]}
+   - Records Removed: {run_stats['rows'] - df_clean.shape[0]}
 
 4. KEY INSIGHTS
    - Most Common Category: {df_clean['Category'].mode()[0] if 'Category' in df_clean.columns else 'N/A'}
@@ -0,0 +1,374 @@
+"""
+Swim Times Columnar Store
+File: swimstore.py
+Purpose: Ingest the Name-Age-Distance-Stroke.txt files once, then query them in microseconds
+
+Each swimdata file holds one comma-separated line of ``m:ss.hh`` (or
+``ss.hh``) times. Instead of listing the directory and re-parsing those
+strings for every question, ``ingest`` packs the whole directory into one
+binary file:
+
+- times:  every time as int centiseconds, in one typed array
+- events: one row per source file (swimmer, age, distance, stroke, start,
+          count, total, best) as parallel typed arrays
+- indexes: event ids sorted by swimmer / age / distance / stroke, plus the
+          [start, stop) range of each value
+
+Re-running ``ingest`` only re-parses files whose size or mtime changed.
+
+Usage:
+    python swimstore.py ingest                      # this directory -> swimdata.store
+    python swimstore.py query --age 10 --distance 100 --stroke Back
+    python swimstore.py bench
+"""
+
+import argparse
+import array
+import json
+import os
+import sys
+import time
+
+MAGIC = b"SWIMST01"
+DEFAULT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE = os.path.join(DEFAULT_DIR, "swimdata.store")
+
+# Event columns (one entry per source file) and their array typecodes
+EVENT_COLUMNS = {
+    "swimmer": "H",   # code into header["swimmers"]
+    "age": "B",
+    "distance": "H",  # meters
+    "stroke": "B",    # code into header["strokes"]
+    "start": "I",     # first time in the times array
+    "count": "H",
+    "total": "q",     # sum of times (centiseconds)
+    "best": "i",      # fastest time (centiseconds)
+}
+INDEXED = ("swimmer", "age", "distance", "stroke")
+
+
+# ============================================================================
+# Parsing
+# ============================================================================
+
+def parse_time(text):
+    """
+    Convert ``m:ss.hh`` or ``ss.hh`` to int centiseconds.
+
+    Example:
+        parse_time("1:31.59")  # 9159
+    """
+    minutes, _, rest = text.strip().rpartition(":")
+    seconds, _, hundredths = rest.partition(".")
+    return (int(minutes or 0) * 60 + int(seconds)) * 100 + int(hundredths or 0)
+
+
+def format_time(centiseconds):
+    """Inverse of parse_time, e.g. 9159 -> "1:31.59"."""
+    centiseconds = round(centiseconds)
+    minutes, rest = divmod(centiseconds, 6000)
+    seconds, hundredths = divmod(rest, 100)
+    if minutes:
+        return f"{minutes}:{seconds:02d}.{hundredths:02d}"
+    return f"{seconds}.{hundredths:02d}"
+
+
+def parse_filename(name):
+    """``"Abi-10-100m-Back.txt"`` -> ``("Abi", 10, 100, "Back")``."""
+    swimmer, age, distance, stroke = name[:-len(".txt")].split("-")
+    return swimmer, int(age), int(distance.rstrip("m")), stroke
+
+
+def read_times(path):
+    with open(path) as f:
+        return [parse_time(t) for t in f.read().split(",") if t.strip()]
+
+
+# ============================================================================
+# Store
+# ============================================================================
+
+class SwimStore:
+    """
+    In-memory view of a store file: typed arrays plus value -> event-id
+    indexes. Build one with ``ingest`` and open it with ``SwimStore.load``.
+
+    Example:
+        store = SwimStore.load("swimdata.store")
+        store.average(age=10, distance=100, stroke="Back")  # centiseconds
+    """
+
+    def __init__(self, header, times, events, permutations):
+        self.header = header
+        self.times = times
+        self.events = events
+        self.swimmers = header["swimmers"]
+        self.strokes = header["strokes"]
+        self.files = header["files"]
+        # value -> frozenset of event ids, built once from the sorted ids
+        self._index = {}
+        for column in INDEXED:
+            perm = permutations[column]
+            self._index[column] = {
+                value: frozenset(perm[start:stop])
+                for value, start, stop in header["ranges"][column]
+            }
+
+    @classmethod
+    def load(cls, path=DEFAULT_STORE):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a swim store")
+        header_len = int.from_bytes(data[8:12], "little")
+        header = json.loads(data[12:12 + header_len])
+        swap = header["byteorder"] != sys.byteorder
+        pos = 12 + header_len
+
+        def take(typecode, length):
+            nonlocal pos
+            arr = array.array(typecode)
+            size = arr.itemsize * length
+            arr.frombytes(data[pos:pos + size])
+            pos += size
+            if swap:
+                arr.byteswap()
+            return arr
+
+        times = take("i", header["n_times"])
+        events = {name: take(code, header["n_events"]) for name, code in EVENT_COLUMNS.items()}
+        permutations = {column: take("H", header["n_events"]) for column in INDEXED}
+        return cls(header, times, events, permutations)
+
+    def select(self, swimmer=None, age=None, distance=None, stroke=None):
+        """
+        Event ids matching every given filter.
+
+        Returns:
+            list: Sorted event ids (all events when no filter is given)
+        """
+        wanted = []
+        for column, value in (("swimmer", swimmer), ("age", age),
+                              ("distance", distance), ("stroke", stroke)):
+            if value is None:
+                continue
+            if column == "swimmer":
+                value = self.swimmers.index(value) if value in self.swimmers else -1
+            elif column == "stroke":
+                value = self.strokes.index(value) if value in self.strokes else -1
+            wanted.append(self._index[column].get(value, frozenset()))
+        if not wanted:
+            return list(range(len(self.files)))
+        wanted.sort(key=len)
+        return sorted(wanted[0].intersection(*wanted[1:]))
+
+    def event(self, event_id):
+        e = self.events
+        start, count = e["start"][event_id], e["count"][event_id]
+        return {
+            "swimmer": self.swimmers[e["swimmer"][event_id]],
+            "age": e["age"][event_id],
+            "distance": e["distance"][event_id],
+            "stroke": self.strokes[e["stroke"][event_id]],
+            "times": self.times[start:start + count].tolist(),
+        }
+
+    def average(self, **filters):
+        """Mean time in centiseconds over every matching time (None if none)."""
+        ids = self.select(**filters)
+        total, count = self.events["total"], self.events["count"]
+        n = sum(count[i] for i in ids)
+        return sum(total[i] for i in ids) / n if n else None
+
+    def best(self, **filters):
+        """Fastest time in centiseconds over every matching event (None if none)."""
+        ids = self.select(**filters)
+        best = self.events["best"]
+        return min((best[i] for i in ids), default=None)
+
+
+# ============================================================================
+# Ingest
+# ============================================================================
+
+def _build(records):
+    # records: list of (name, size, mtime_ns, swimmer, age, distance, stroke, times)
+    records = sorted(records)
+    swimmers = sorted({r[3] for r in records})
+    strokes = sorted({r[6] for r in records})
+    swimmer_code = {s: i for i, s in enumerate(swimmers)}
+    stroke_code = {s: i for i, s in enumerate(strokes)}
+
+    times = array.array("i")
+    events = {name: array.array(code) for name, code in EVENT_COLUMNS.items()}
+    for name, size, mtime_ns, swimmer, age, distance, stroke, values in records:
+        events["swimmer"].append(swimmer_code[swimmer])
+        events["age"].append(age)
+        events["distance"].append(distance)
+        events["stroke"].append(stroke_code[stroke])
+        events["start"].append(len(times))
+        events["count"].append(len(values))
+        events["total"].append(sum(values))
+        events["best"].append(min(values, default=0))
+        times.extend(values)
+
+    permutations, ranges = {}, {}
+    for column in INDEXED:
+        values = events[column]
+        perm = array.array("H", sorted(range(len(records)), key=lambda i: (values[i], i)))
+        column_ranges = []
+        for pos, event_id in enumerate(perm):
+            if not column_ranges or column_ranges[-1][0] != values[event_id]:
+                column_ranges.append([values[event_id], pos, pos + 1])
+            else:
+                column_ranges[-1][2] = pos + 1
+        permutations[column], ranges[column] = perm, column_ranges
+
+    header = {
+        "byteorder": sys.byteorder,
+        "n_times": len(times),
+        "n_events": len(records),
+        "swimmers": swimmers,
+        "strokes": strokes,
+        "files": [[r[0], r[1], r[2]] for r in records],
+        "ranges": ranges,
+    }
+    return header, times, events, permutations
+
+
+def _write(path, header, times, events, permutations):
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(4, "little"))
+        f.write(header_bytes)
+        times.tofile(f)
+        for name in EVENT_COLUMNS:
+            events[name].tofile(f)
+        for column in INDEXED:
+            permutations[column].tofile(f)
+    # Readers never see a half-written store
+    os.replace(tmp, path)
+
+
+def ingest(directory=DEFAULT_DIR, store_path=DEFAULT_STORE):
+    """
+    Pack every ``Name-Age-Distance-Stroke.txt`` file into ``store_path``.
+
+    Files whose size and mtime match the existing store are not re-read;
+    new or changed files are parsed and deleted files are dropped.
+
+    Returns:
+        dict: Counts of parsed, reused and removed files
+    """
+    previous = {}
+    if os.path.exists(store_path):
+        try:
+            old = SwimStore.load(store_path)
+            for event_id, (name, size, mtime_ns) in enumerate(old.files):
+                previous[name] = (size, mtime_ns, old.event(event_id)["times"])
+        except (ValueError, KeyError, json.JSONDecodeError):
+            previous = {}
+
+    records, parsed, reused = [], 0, 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt") or entry.name.count("-") != 3:
+                continue
+            st = entry.stat()
+            cached = previous.pop(entry.name, None)
+            if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                values = cached[2]
+                reused += 1
+            else:
+                values = read_times(entry.path)
+                parsed += 1
+            records.append((entry.name, st.st_size, st.st_mtime_ns,
+                            *parse_filename(entry.name), values))
+
+    _write(store_path, *_build(records))
+    return {"parsed": parsed, "reused": reused, "removed": len(previous), "events": len(records)}
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def naive_average(directory, age=None, distance=None, stroke=None, swimmer=None):
+    """The per-query way: list the directory, split names, parse every file."""
+    values = []
+    for name in os.listdir(directory):
+        if not name.endswith(".txt") or name.count("-") != 3:
+            continue
+        s, a, d, st = parse_filename(name)
+        if ((swimmer is None or s == swimmer) and (age is None or a == age)
+                and (distance is None or d == distance) and (stroke is None or st == stroke)):
+            values.extend(read_times(os.path.join(directory, name)))
+    return sum(values) / len(values) if values else None
+
+
+def _per_call_us(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar store for swimdata times")
+    parser.add_argument("command", choices=["ingest", "query", "bench"])
+    parser.add_argument("-d", "--directory", default=DEFAULT_DIR)
+    parser.add_argument("-s", "--store", default=DEFAULT_STORE)
+    parser.add_argument("--swimmer")
+    parser.add_argument("--age", type=int)
+    parser.add_argument("--distance", type=int, help="Meters, e.g. 100")
+    parser.add_argument("--stroke", help="Back, Breast, Fly, Free or IM")
+    args = parser.parse_args()
+    filters = {"swimmer": args.swimmer, "age": args.age,
+               "distance": args.distance, "stroke": args.stroke}
+
+    if args.command == "ingest":
+        start = time.perf_counter()
+        counts = ingest(args.directory, args.store)
+        print(f"✓ {counts['events']} files -> {args.store} "
+              f"({counts['parsed']} parsed, {counts['reused']} unchanged, "
+              f"{counts['removed']} removed) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return
+
+    if not os.path.exists(args.store):
+        ingest(args.directory, args.store)
+    store = SwimStore.load(args.store)
+
+    if args.command == "query":
+        ids = store.select(**filters)
+        for event_id in ids:
+            e = store.event(event_id)
+            print(f"{e['swimmer']:>8} {e['age']:>3} {e['distance']:>4}m {e['stroke']:<7} "
+                  + ", ".join(format_time(t) for t in e["times"]))
+        average = store.average(**filters)
+        if average is None:
+            print("No matching times")
+            return
+        print("-" * 60)
+        print(f"{len(ids)} events, average {format_time(average)}, best {format_time(store.best(**filters))}")
+        print(f"Query time: {_per_call_us(lambda: store.average(**filters), 10000):.2f} µs")
+        return
+
+    print("=" * 60)
+    print("Average 100m Back for 10-year-olds")
+    print("=" * 60)
+    query = {"age": 10, "distance": 100, "stroke": "Back"}
+    expected = naive_average(args.directory, **query)
+    assert store.average(**query) == expected, "store and files disagree"
+    naive_us = _per_call_us(lambda: naive_average(args.directory, **query), 200)
+    store_us = _per_call_us(lambda: store.average(**query), 20000)
+    load_us = _per_call_us(lambda: SwimStore.load(args.store), 200)
+    print(f"Answer:                 {format_time(expected)}")
+    print(f"listdir + parse files:  {naive_us:10.1f} µs/query")
+    print(f"columnar store:         {store_us:10.2f} µs/query  ({naive_us / store_us:,.0f}x faster)")
+    print(f"store load (once):      {load_us:10.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ base_dir = Path(__file__).parent
 sys.path.insert(0, str(base_dir))
 
 # Now we can import from graphics
-from graphics.engine import load_plugin
+from graphics.engine import get_render_cache, load_plugin, render
 
 def main():
     print("=" * 60)
@@ -53,6 +53,19 @@ def main():
     print("\n6. Namespace package structure:")
     print(f"   graphics.__path__ = {__import__('graphics').__path__}")
 
+    # Decoding the same data again is served from the render cache
+    print("\n7. Render cache (decoding sample SVG again)...")
+    decoder.decode(sample_svg)
+    for key, value in get_render_cache().stats().items():
+        print(f"   {key}: {value}")
+
+    # Non-text data still renders; it just bypasses the cache
+    print("\n8. Rendering non-text data (not cached)...")
+    assert render({'a': 1}, "SVG") == "Rendered: {'a': 1}"
+    assert render(42, "SVG") == "Rendered: 42"
+    assert decoder.decode(42) == "Rendered: 42"
+    print("   ✓ dict and int inputs render as before")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Start-up benchmark for the plugin registry.
+
+Generates a throwaway plugin tree with many format plugins, then starts a
+fresh interpreter with ``python -X importtime`` for two strategies:
+
+- eager: import every plugin at start-up (what resolving all plugins
+  through ``importlib.import_module`` up front costs)
+- lazy:  read ``plugins/manifest.json`` and import only the plugin that
+  is actually used, through ``graphics.engine.load_plugin``
+
+and reports the process wall time, the time spent resolving plugins, the
+number of modules in ``sys.modules`` and the slowest imports that
+``-X importtime`` recorded.
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+base_dir = Path(__file__).parent
+
+PLUGIN_TEMPLATE = '''
+"""Generated {name} plugin."""
+import xml.dom.minidom
+from graphics.engine import register_format, render
+
+{helpers}
+
+class {cls}Decoder:
+    def __init__(self):
+        register_format("{upper}")
+
+    def decode(self, data):
+        return render(data, "{upper}")
+
+    def info(self):
+        return {{"name": "{cls} Decoder", "version": "1.0", "formats": ["{name}", "{name}z"]}}
+'''
+
+EAGER = '''
+import importlib, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+names = {names!r}
+modules = {{n: importlib.import_module(f"plugins.{{n}}") for n in names}}
+modules[names[len(names) // 2]]
+print(time.perf_counter() - start, len(sys.modules))
+'''
+
+LAZY = '''
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from graphics.engine import load_plugin
+load_plugin({target!r})
+print(time.perf_counter() - start, len(sys.modules))
+'''
+
+
+def make_plugin_tree(root, count, helpers_per_plugin):
+    shutil.copytree(base_dir / "graphics", root / "graphics",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    plugins = root / "plugins"
+    plugins.mkdir()
+    (plugins / "__init__.py").write_text("")
+    names = [f"fmt{i:03d}" for i in range(count)]
+    helpers = "\n".join(
+        f"def helper_{j}(x):\n    return [x * {j} for _ in range(3)]\n"
+        for j in range(helpers_per_plugin)
+    )
+    for name in names:
+        (plugins / f"{name}.py").write_text(PLUGIN_TEMPLATE.format(
+            name=name, cls=name.capitalize(), upper=name.upper(), helpers=helpers))
+
+    sys.path.insert(0, str(root))
+    try:
+        from graphics.engine import build_manifest
+        build_manifest(names, plugins / "manifest.json")
+    finally:
+        sys.path.remove(str(root))
+        for mod in [m for m in sys.modules if m == "plugins" or m.startswith(("plugins.", "graphics"))]:
+            del sys.modules[mod]
+    return names
+
+
+def run_once(code, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, check=True)
+    wall = time.perf_counter() - start
+    resolve, modules = proc.stdout.split()
+    # "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].strip()))
+    return wall, float(resolve), int(modules), sorted(imports, reverse=True)[:3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plugin start-up benchmark")
+    parser.add_argument("-n", "--plugins", type=int, default=60, help="Number of generated plugins")
+    parser.add_argument("-r", "--repeat", type=int, default=7, help="Runs per strategy")
+    parser.add_argument("--helpers", type=int, default=150, help="Functions per generated plugin")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "tree"
+        root.mkdir()
+        names = make_plugin_tree(root, args.plugins, args.helpers)
+        # Outside the plugin tree, so writing it doesn't change the tree's mtime
+        env = {"GRAPHICS_CACHE_DIR": str(Path(tmp) / "cache"), "PATH": ""}
+
+        scenarios = {
+            "eager": EAGER.format(root=str(root), names=names),
+            "lazy": LAZY.format(root=str(root), target=names[len(names) // 2] + "z"),
+        }
+
+        print("=" * 60)
+        print(f"Plugin start-up benchmark ({args.plugins} plugins, {args.repeat} runs)")
+        print("=" * 60)
+        results = {}
+        for label, code in scenarios.items():
+            run_once(code, env)  # warm the OS file cache and the entry-point cache
+            runs = [run_once(code, env) for _ in range(args.repeat)]
+            wall = statistics.median(r[0] for r in runs) * 1000
+            resolve = statistics.median(r[1] for r in runs) * 1000
+            modules = runs[0][2]
+            slowest = ", ".join(f"{name} {us / 1000:.1f}ms" for us, name in runs[0][3])
+            results[label] = wall
+            print(f"{label:6s} wall {wall:7.1f} ms | resolve {resolve:7.1f} ms | {modules} modules")
+            print(f"       slowest imports: {slowest}")
+
+        print(f"\nLazy registry start-up speedup: {results['eager'] / results['lazy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
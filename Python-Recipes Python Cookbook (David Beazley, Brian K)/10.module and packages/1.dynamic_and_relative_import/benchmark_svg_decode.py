@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark (documents/sec) for the SVG plugin's decode APIs:
+
+- per-call:  a new SVGDecoder for every document (the old decode_svg)
+- batch:     one decoder reused through decode_batch
+- pool:      decode_batch fanned out over worker processes
+- stream:    stream_decode over SVGZ files on disk
+
+Plugin/engine log lines go to os.devnull so the terminal isn't the bottleneck,
+and the render cache is cleared before each mode so every mode does the work.
+"""
+
+import argparse
+import contextlib
+import gzip
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+base_dir = Path(__file__).parent
+sys.path.insert(0, str(base_dir))
+
+from graphics.engine import get_render_cache
+from plugins import svg
+
+
+def make_document(i, shapes):
+    body = "".join(f'<circle cx="{i % 97}" cy="{j}" r="{j % 7 + 1}"/>' for j in range(shapes))
+    return f'<svg xmlns="http://www.w3.org/2000/svg">{body}</svg>'
+
+
+def timed(label, count, func):
+    get_render_cache().clear()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    print(f"{label:10s} {count / elapsed:12,.0f} docs/sec  ({elapsed:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SVG decode throughput benchmark")
+    parser.add_argument("-n", "--documents", type=int, default=20000)
+    parser.add_argument("--shapes", type=int, default=20, help="Shapes per document")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--files", type=int, default=200, help="SVGZ files for the stream test")
+    args = parser.parse_args()
+
+    documents = [make_document(i, args.shapes) for i in range(args.documents)]
+
+    print("=" * 60)
+    print(f"SVG decode throughput ({args.documents:,} docs, {args.workers} workers)")
+    print("=" * 60)
+
+    timed("per-call", len(documents), lambda: [svg.SVGDecoder().decode(d) for d in documents])
+    timed("batch", len(documents), lambda: svg.decode_batch(documents))
+    timed("pool", len(documents), lambda: svg.decode_batch(documents, workers=args.workers, chunksize=256))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = Path(tmp) / f"doc{i}.svgz"
+            with gzip.open(path, "wt") as f:
+                f.write(make_document(i, args.shapes * 50))
+            paths.append(str(path))
+        timed("stream", len(paths), lambda: list(svg.stream_decode(paths)))
+        timed("stream+pool", len(paths), lambda: list(svg.stream_decode(paths, workers=args.workers)))
+
+
+if __name__ == "__main__":
+    main()
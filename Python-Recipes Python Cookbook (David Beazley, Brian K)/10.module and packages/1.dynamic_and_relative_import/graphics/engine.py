@@ -1,25 +1,243 @@
 """
 Graphics Engine Module
 Provides core functionality and dynamic plugin loading.
+
+Plugins are resolved through a registry instead of being imported up
+front. The registry is filled from:
+
+1. ``plugins/manifest.json`` - a precomputed map of plugin names, formats
+   and extensions to module paths (see ``build_manifest``)
+2. ``importlib.metadata`` entry points in the ``graphics.plugins`` group,
+   cached on disk so the (slow) scan only happens when sys.path changes
+
+Nothing is imported until a plugin is first used; after that the module
+is memoized.
+
+``render`` and plugin ``decode`` methods (via ``cached_decode``) sit behind
+a shared, content-addressed ``RenderCache`` (see ``graphics.render_cache``),
+so re-rendering the same asset returns the stored result.
 """
+import functools
 import importlib
+import json
+import os
+import sys
+import threading
+
+ENTRY_POINT_GROUP = "graphics.plugins"
+MANIFEST_NAME = "manifest.json"
+CACHE_DIR = os.environ.get("GRAPHICS_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "graphics"))
+
+
+class PluginRegistry:
+    """
+    Maps plugin names, format names and file extensions to module paths
+    and imports each module at most once.
+    """
+
+    def __init__(self):
+        self._modules = {}      # plugin name -> module path
+        self._aliases = {}      # format name / extension -> plugin name
+        self._loaded = {}       # plugin name -> imported module
+        self._formats = set()
+        self._discovered = False
+        self._lock = threading.RLock()
+
+    def register(self, name, module_path, formats=()):
+        """
+        Register a plugin without importing it.
+
+        Args:
+            name (str): Plugin name (e.g., "svg")
+            module_path (str): Importable module path (e.g., "plugins.svg")
+            formats (iterable): Format names / extensions it handles
+        """
+        with self._lock:
+            self._modules.setdefault(name, module_path)
+            for fmt in formats:
+                self._aliases.setdefault(fmt.lower().lstrip("."), name)
+
+    def add_format(self, format_name):
+        """Record a format registered at runtime; True if it is new."""
+        with self._lock:
+            if format_name in self._formats:
+                return False
+            self._formats.add(format_name)
+            return True
+
+    @property
+    def formats(self):
+        return frozenset(self._formats)
+
+    def names(self):
+        self.discover()
+        return sorted(self._modules)
+
+    def resolve(self, key):
+        """
+        Find the plugin name for a plugin name, format name or extension.
+
+        Returns:
+            str: Plugin name, or None if nothing matches
+        """
+        self.discover()
+        key = key.lower().lstrip(".")
+        if key in self._modules:
+            return key
+        return self._aliases.get(key)
+
+    def load(self, key):
+        """
+        Import (once) and return the plugin module for ``key``.
+
+        Unknown names fall back to ``plugins.<key>`` so plugins that are
+        not in the manifest still load the way they always did.
+        """
+        loaded = self._loaded.get(key)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            name = self.resolve(key) or key
+            module = self._loaded.get(name)
+            if module is None:
+                module_path = self._modules.get(name, f"plugins.{name}")
+                module = importlib.import_module(module_path)
+                self._loaded[name] = module
+            self._loaded[key] = module
+            return module
+
+    def discover(self):
+        """Fill the registry from the manifest and entry points (once)."""
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            for name, entry in _read_manifest().items():
+                self.register(name, entry["module"], entry.get("formats", ()))
+            for name, entry in _cached_entry_points().items():
+                self.register(name, entry["module"], entry.get("formats", ()))
+            self._discovered = True
+
+
+def _manifest_path():
+    plugins = sys.modules.get("plugins")
+    if plugins is not None and getattr(plugins, "__file__", None):
+        return os.path.join(os.path.dirname(plugins.__file__), MANIFEST_NAME)
+    # Find the plugins package directory without importing it
+    for entry in sys.path:
+        candidate = os.path.join(entry or ".", "plugins", MANIFEST_NAME)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _read_manifest():
+    path = _manifest_path()
+    if path is None:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("plugins", {})
+
+
+def _sys_path_key():
+    """sys.path and each entry's mtime: changes when packages do."""
+    key = []
+    for entry in sys.path:
+        try:
+            mtime = os.stat(entry or ".").st_mtime_ns
+        except OSError:
+            mtime = 0
+        key.append([entry, mtime])
+    return key
+
+
+def _cached_entry_points():
+    """
+    Entry points in the ``graphics.plugins`` group, read from the disk
+    cache when sys.path is unchanged since they were last scanned.
+    """
+    key = _sys_path_key()
+    cache_file = os.path.join(CACHE_DIR, "entry_points.json")
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["plugins"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # Imported here: importlib.metadata itself is not free to import
+    import importlib.metadata
+
+    plugins = {}
+    for ep in importlib.metadata.entry_points(group=ENTRY_POINT_GROUP):
+        plugins[ep.name] = {"module": ep.module, "formats": [ep.name]}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "plugins": plugins}, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+    return plugins
+
+
+def build_manifest(plugin_names, path=None):
+    """
+    Import each plugin once and write the manifest used at startup.
+
+    Run this at build/install time, not on every start-up. Each plugin
+    module is expected to expose a class with an ``info()`` method
+    returning ``{"formats": [...]}`` (like ``SVGDecoder``).
+
+    Args:
+        plugin_names (iterable): Module names inside ``plugins``
+        path (str): Where to write; defaults to ``plugins/manifest.json``
+
+    Returns:
+        dict: The manifest that was written
+    """
+    manifest = {}
+    for name in plugin_names:
+        module_path = f"plugins.{name}"
+        module = importlib.import_module(module_path)
+        formats = []
+        for obj in vars(module).values():
+            if isinstance(obj, type) and obj.__module__ == module_path and hasattr(obj, "info"):
+                # info() is static data; skip __init__ so nothing registers
+                formats.extend(obj.info(obj.__new__(obj)).get("formats", []))
+        manifest[name] = {"module": module_path, "formats": formats or [name]}
+
+    if path is None:
+        path = os.path.join(os.path.dirname(sys.modules["plugins"].__file__), MANIFEST_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"plugins": manifest}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return manifest
+
+
+registry = PluginRegistry()
 
 
 def load_plugin(plugin_name):
     """
-    Dynamically load a plugin by name from the plugins namespace.
-    
+    Load a plugin by name, format name or extension from the registry.
+
+    The module is imported on first use and memoized afterwards.
+
     Args:
-        plugin_name (str): Name of the plugin module (e.g., "svg")
-    
+        plugin_name (str): Plugin name (e.g., "svg") or format ("svgz")
+
     Returns:
         module: The imported plugin module
-    
+
     Example:
         >>> svg_plugin = load_plugin("svg")
     """
-    module_path = f"plugins.{plugin_name}"
-    return importlib.import_module(module_path)
+    return registry.load(plugin_name)
 
 
 def register_format(format_name):
@@ -27,13 +245,80 @@ def register_format(format_name):
     Utility function that plugins can use to register themselves.
     This demonstrates a shared utility accessible via imports.
     """
-    print(f"[Engine] Registered format: {format_name}")
+    if registry.add_format(format_name):
+        print(f"[Engine] Registered format: {format_name}")
     return True
 
 
-def render(data, format_type):
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache():
     """
-    Core rendering function that plugins might utilize.
+    The process-wide render cache, created on first use so importing the
+    engine stays cheap.
+
+    Settings come from ``configure_render_cache`` or, failing that, from
+    ``GRAPHICS_RENDER_CACHE_DIR`` (enables the on-disk tier).
     """
+    global _render_cache
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                from graphics.render_cache import RenderCache
+                _render_cache = RenderCache(disk_dir=os.environ.get("GRAPHICS_RENDER_CACHE_DIR"))
+    return _render_cache
+
+
+def configure_render_cache(**settings):
+    """
+    Replace the render cache, e.g. ``configure_render_cache(max_bytes=...,
+    disk_dir=...)``. Accepts the ``RenderCache`` arguments.
+    """
+    global _render_cache
+    from graphics.render_cache import RenderCache
+    with _render_cache_lock:
+        _render_cache = RenderCache(**settings)
+    return _render_cache
+
+
+# What content_key can hash; anything else is rendered without the cache
+_KEYABLE_TYPES = (str, bytes, bytearray, memoryview)
+
+
+def cached_decode(method):
+    """
+    Decorator for plugin ``decode(self, data)`` methods: results are stored
+    in the render cache, keyed by the plugin's ``format_name`` and ``data``.
+    Data that is not str or bytes-like is decoded without the cache.
+    """
+    @functools.wraps(method)
+    def wrapper(self, data):
+        if not isinstance(data, _KEYABLE_TYPES):
+            return method(self, data)
+        from graphics.render_cache import content_key
+        key = content_key(f"decode:{self.format_name}", data)
+        return get_render_cache().get_or_compute(key, lambda: method(self, data))
+    return wrapper
+
+
+def _render(data, format_type):
     print(f"[Engine] Rendering {format_type} data...")
     return f"Rendered: {data}"
+
+
+def render(data, format_type, cache=True):
+    """
+    Core rendering function that plugins might utilize.
+
+    Results are cached by content, so rendering the same data twice only
+    does the work once. Pass ``cache=False`` for one-off data (e.g. the
+    elements of a streamed file) that would only evict reusable entries.
+    Data that is not str or bytes-like (e.g. a dict) is never cached.
+    """
+    if not cache or not isinstance(data, _KEYABLE_TYPES):
+        return _render(data, format_type)
+    from graphics.render_cache import content_key
+    key = content_key(f"render:{format_type}", data)
+    return get_render_cache().get_or_compute(key, lambda: _render(data, format_type))
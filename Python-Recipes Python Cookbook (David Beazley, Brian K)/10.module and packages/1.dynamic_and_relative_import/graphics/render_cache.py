@@ -0,0 +1,230 @@
+"""
+Render Cache Module
+Content-addressed, size-bounded cache for render and decode results.
+
+Results are keyed by a hash of the format and the input data, kept in an
+in-memory LRU limited by a byte budget, and - when a disk directory is
+given - results above ``disk_threshold`` bytes (or evicted from memory)
+are spilled to a second, also size-bounded, on-disk LRU tier.
+
+All access is thread-safe. When several threads ask for the same missing
+key at once, only one computes it and the others wait for its result.
+"""
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+
+def content_key(namespace, data):
+    """
+    Hash ``data`` (str or bytes-like) under ``namespace`` (e.g. a format name).
+
+    Returns:
+        str: Hex digest used as the cache key
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogatepass")
+    digest = hashlib.blake2b(namespace.encode("utf-8"), digest_size=20)
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _sizeof(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class _InFlight:
+    """A computation one thread is running that others can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class RenderCache:
+    """
+    LRU cache with a byte-size budget and an optional on-disk tier.
+
+    Args:
+        max_bytes (int): Budget for the in-memory tier
+        disk_dir (str): Directory for the on-disk tier (None disables it)
+        disk_max_bytes (int): Budget for the on-disk tier
+        disk_threshold (int): Results at least this large skip memory
+            and go straight to disk
+    """
+
+    def __init__(self, max_bytes=64 * 1024**2, disk_dir=None,
+                 disk_max_bytes=1024**3, disk_threshold=1024**2):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_threshold = disk_threshold
+        self._memory = OrderedDict()    # key -> (value, size)
+        self._memory_bytes = 0
+        self._disk = OrderedDict()      # key -> size on disk
+        self._disk_bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def stats(self):
+        """Counters and current usage of both tiers."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._disk):
+                self._remove_disk(key)
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for ``key`` or compute, store and return it.
+
+        Args:
+            key (str): Cache key (see ``content_key``)
+            compute (callable): Zero-argument function producing the value
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = self._inflight[key] = _InFlight()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            with self._lock:
+                self.hits += 1
+            return inflight.value
+
+        try:
+            value = self._read_disk(key)
+            from_disk = value is not None
+            if from_disk:
+                with self._lock:
+                    self.disk_hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+            self._store(key, value, from_disk)
+            inflight.value = value
+            return value
+        except BaseException as exc:
+            inflight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.done.set()
+
+    def _store(self, key, value, from_disk=False):
+        size = _sizeof(value)
+        if self.disk_dir is not None and size >= self.disk_threshold:
+            if not from_disk:
+                self._write_disk(key, value)
+            return
+        if size > self.max_bytes:
+            return
+        spill = []
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = (value, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes:
+                old_key, (old_value, old_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= old_size
+                self.evictions += 1
+                spill.append((old_key, old_value))
+        if self.disk_dir is not None:
+            for old_key, old_value in spill:
+                self._write_disk(old_key, old_value)
+
+    # -- disk tier -----------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".pkl"):
+                st = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((st.st_mtime_ns, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        with self._lock:
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self._remove_disk(key)
+            return None
+
+    def _write_disk(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.disk_max_bytes:
+            return
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            while self._disk_bytes > self.disk_max_bytes:
+                self._remove_disk(next(iter(self._disk)))
+                self.evictions += 1
+
+    def _remove_disk(self, key):
+        # Caller holds the lock
+        self._disk_bytes -= self._disk.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -3,37 +3,126 @@ SVG Plugin Module
 Demonstrates imports to access engine utilities in namespace packages.
 """
 
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
 # For namespace packages, we can use absolute imports
 # since both directories are in sys.path and merge into 'graphics'
-from graphics.engine import register_format, render
+from graphics.engine import cached_decode, register_format, render
 
 # Note: Relative imports (from ...engine import ...) work in regular packages
 # but can be tricky with namespace packages. The absolute import above
 # demonstrates how plugins access the core engine across namespace boundaries.
 
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _read_chunks(source, chunk_size=CHUNK_SIZE):
+    """
+    Yield the raw SVG bytes of a path or binary stream in bounded chunks,
+    decompressing SVGZ (gzip) on the fly.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _read_chunks(f, chunk_size)
+        return
+
+    chunk = source.read(chunk_size)
+    if not chunk.startswith(GZIP_MAGIC):
+        while chunk:
+            yield chunk
+            chunk = source.read(chunk_size)
+        return
+
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    while chunk:
+        # max_length keeps each decompressed piece at most chunk_size bytes
+        data = inflater.decompress(chunk, chunk_size)
+        while data:
+            yield data
+            data = inflater.decompress(inflater.unconsumed_tail, chunk_size)
+        chunk = source.read(chunk_size)
+    tail = inflater.flush()
+    if tail:
+        yield tail
+
 
 class SVGDecoder:
     """SVG format decoder implementation."""
-    
+
     def __init__(self):
         # Register this format with the engine
         register_format("SVG")
         self.format_name = "SVG"
-    
+
+    @cached_decode
     def decode(self, svg_data):
         """
-        Decode SVG data.
-        
+        Decode SVG data (cached by content).
+
         Args:
             svg_data (str): SVG content as string
-        
+
         Returns:
             str: Decoded/rendered output
         """
         print(f"[SVG Plugin] Decoding SVG data...")
         # Use the engine's render function
         return render(svg_data, self.format_name)
-    
+
+    def decode_batch(self, documents):
+        """
+        Decode many in-memory SVG documents with this one decoder,
+        through the same cached ``decode`` path as single documents.
+
+        Args:
+            documents (iterable): SVG content strings
+
+        Returns:
+            list: Decoded/rendered output, in input order
+        """
+        documents = list(documents)
+        print(f"[SVG Plugin] Decoding {len(documents)} SVG documents...")
+        return [self.decode(svg_data) for svg_data in documents]
+
+    def iter_decode(self, source, chunk_size=CHUNK_SIZE):
+        """
+        Stream-decode a large SVG/SVGZ file without loading it whole.
+
+        The file is decompressed and parsed chunk by chunk; every top-level
+        element under ``<svg>`` is rendered as soon as it is complete and
+        then dropped from the tree, so memory stays at about one chunk plus
+        one element. Elements bypass the render cache: they are rarely
+        seen twice and would evict the entries that are.
+
+        Args:
+            source: File path or binary stream (plain or gzip-compressed)
+            chunk_size (int): Bytes read per step
+
+        Yields:
+            str: Decoded/rendered output for each top-level element
+        """
+        print(f"[SVG Plugin] Streaming SVG data...")
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        root, depth = None, 0
+        for chunk in _read_chunks(source, chunk_size):
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    yield render(ElementTree.tostring(elem, encoding="unicode"), self.format_name,
+                                 cache=False)
+                    root.remove(elem)
+        parser.close()
+
     def info(self):
         """Return plugin information."""
         return {
@@ -43,10 +132,63 @@ class SVGDecoder:
         }
 
 
+_shared_decoder = None
+
+
+def _get_decoder():
+    # One decoder per process, so register_format runs once, not per call
+    global _shared_decoder
+    if _shared_decoder is None:
+        _shared_decoder = SVGDecoder()
+    return _shared_decoder
+
+
+def _decode_source(source):
+    return list(_get_decoder().iter_decode(source))
+
+
 # Module-level convenience function
 def decode_svg(svg_content):
     """
     Convenience function to decode SVG without instantiating the class.
     """
-    decoder = SVGDecoder()
-    return decoder.decode(svg_content)
+    return _get_decoder().decode(svg_content)
+
+
+def decode_batch(documents, workers=None, chunksize=64):
+    """
+    Decode many SVG strings, reusing one decoder per process.
+
+    Args:
+        documents (iterable): SVG content strings
+        workers (int): Fan out over this many processes (None = in-process)
+        chunksize (int): Documents sent to a worker per task
+
+    Returns:
+        list: Decoded/rendered output, in input order
+    """
+    if not workers or workers <= 1:
+        return _get_decoder().decode_batch(documents)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(decode_svg, documents, chunksize=chunksize))
+
+
+def stream_decode(sources, workers=None):
+    """
+    Stream-decode SVG/SVGZ files one after another.
+
+    Args:
+        sources (iterable): File paths or binary streams; with ``workers``
+            they must be paths so each worker opens its own file
+        workers (int): Fan out over this many processes (None = in-process)
+
+    Yields:
+        tuple: ``(source, [rendered top-level elements])`` in input order
+    """
+    if not workers or workers <= 1:
+        for source in sources:
+            yield source, list(_get_decoder().iter_decode(source))
+        return
+    sources = list(sources)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from zip(sources, pool.map(_decode_source, sources))
@@ -39,7 +39,23 @@ except NameError:
 print("\n3. Direct import and execution")
 print("-" * 60)
 from processor import run_process
-config = run_process()
+# One worker: this script has no __main__ guard for a process pool to re-import
+stats = run_process(workers=1)
+print(f"Returned stats: {stats.records_in:,} records in {stats.elapsed:.2f}s")
+
+print("\n4. Config is memoized until config.json changes")
+print("-" * 60)
+import os
+from processor.config import load_config, _DEFAULT_PATH
+
+first = load_config()
+print(f"✓ Second load returns the cached object: {load_config() is first}")
+st = os.stat(_DEFAULT_PATH)
+os.utime(_DEFAULT_PATH, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+try:
+    print(f"✓ Reloaded after mtime change: {load_config() is not first}")
+finally:
+    os.utime(_DEFAULT_PATH, ns=(st.st_atime_ns, st.st_mtime_ns))
 
 print("\n" + "=" * 60)
 print("All tests completed!")
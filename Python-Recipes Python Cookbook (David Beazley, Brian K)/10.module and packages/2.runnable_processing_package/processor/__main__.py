@@ -1,5 +1,15 @@
+import argparse
+
 from .core import run_process
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m processor", description="Run the data-processing pipeline")
+    parser.add_argument('input', nargs='?', help="Input file, one record per line (default: sample data)")
+    parser.add_argument('-o', '--output', help="Write output records here")
+    parser.add_argument('-w', '--workers', type=int, help="Worker processes (default: settings.max_workers)")
+    parser.add_argument('--chunk-size', type=int, help="Lines per chunk (default: pipeline.chunk_size)")
+    parser.add_argument('--config', help="Alternative config.json")
+    args = parser.parse_args()
+
     print("Starting Processor Application...")
-    run_process()
+    run_process(args.input, args.output, args.workers, args.chunk_size, args.config)
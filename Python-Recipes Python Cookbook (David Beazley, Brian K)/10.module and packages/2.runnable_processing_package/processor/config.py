@@ -0,0 +1,45 @@
+import json
+import os
+import pkgutil
+
+__all__ = ['load_config']
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
+_cache = {}
+
+
+def load_config(path=None):
+    """
+    Load the processor config once and reuse it until the file changes.
+
+    The parsed config is memoized per path and keyed on the file's
+    ``st_mtime_ns``, so repeated calls cost one ``os.stat``. When the
+    package is not on disk (e.g. run from a zip), the bundled config is
+    read once through ``pkgutil.get_data`` and never invalidated.
+
+    Args:
+        path (str): Config file to load (default: the bundled config.json)
+
+    Returns:
+        dict: Parsed config (shared, so don't mutate it)
+    """
+    path = path or _DEFAULT_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        if path != _DEFAULT_PATH:
+            raise
+        mtime = None
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    if mtime is None:
+        raw_data = pkgutil.get_data(__package__, 'config.json')
+    else:
+        with open(path, 'rb') as f:
+            raw_data = f.read()
+    config = json.loads(raw_data.decode('utf-8'))
+    _cache[path] = (mtime, config)
+    return config
@@ -1,18 +1,66 @@
-import pkgutil
-import json
+from .config import load_config
+from .engine import run_pipeline
 
 __all__ = ['run_process']
 
+_REGIONS = ['north', 'south', 'east', 'west']
+
+
 def _internal_helper():
     return "This is an internal function"
 
-def _load_config():
-    raw_data = pkgutil.get_data(__package__, 'config.json')
-    return json.loads(raw_data.decode('utf-8'))
+def _load_config(path=None):
+    return load_config(path)
+
+def _sample_lines(count):
+    # Synthetic "id,region,price,qty" input for runs without an input file
+    for i in range(count):
+        yield f"{i},{_REGIONS[i % 4]},{(i * 37) % 1000 / 10},{i % 7}\n"
+
+def run_process(input_path=None, output_path=None, workers=None, chunk_size=None, config_path=None):
+    """
+    Run the configured stage pipeline over an input file (or sample data).
+
+    Args:
+        input_path (str): Text file with one record per line (default:
+            ``pipeline.sample_records`` synthetic records)
+        output_path (str): Where to write the output lines (default: discard)
+        workers (int): Worker processes (default: ``settings.max_workers``)
+        chunk_size (int): Lines per chunk (default: ``pipeline.chunk_size``)
+        config_path (str): Alternative config file
+
+    Returns:
+        RunStats: Record counts, records/sec and per-stage seconds
+    """
+    config = _load_config(config_path)
+    settings = config.get('settings', {})
+    pipeline = config.get('pipeline', {})
+    print(f"Running with config: {config.get('name')} {config.get('version')}")
+    print(f"Processing data with settings: {settings}")
+
+    workers = workers or settings.get('max_workers', 1)
+    chunk_size = chunk_size or pipeline.get('chunk_size', 5000)
+    stages = pipeline.get('stages', [])
+    print(f"Stages: {' -> '.join(spec['stage'] for spec in stages)} "
+          f"({workers} workers, {chunk_size:,} lines/chunk)")
 
-def run_process():
-    config = _load_config()
-    print(f"Running with config: {config}")
-    helper_msg = _internal_helper()
-    print(f"Processing data with settings: {config.get('settings', {})}")
-    return config
+    infile = open(input_path) if input_path else None
+    outfile = open(output_path, 'w') if output_path else None
+    try:
+        lines = infile if infile else _sample_lines(pipeline.get('sample_records', 10000))
+        sink = (lambda output: outfile.writelines(line + '\n' for line in output)) if outfile else None
+        stats = run_pipeline(
+            lines, stages,
+            workers=workers,
+            chunk_size=chunk_size,
+            max_pending=pipeline.get('max_pending'),
+            sink=sink,
+            retry_attempts=settings.get('retry_attempts', 0),
+            timeout=settings.get('timeout'),
+        )
+    finally:
+        for f in (infile, outfile):
+            if f:
+                f.close()
+    stats.report()
+    return stats
@@ -0,0 +1,147 @@
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .stages import build_pipeline
+
+__all__ = ['run_pipeline', 'RunStats']
+
+_pipelines = {}
+
+
+def _get_pipeline(specs_key):
+    # Built once per process and per stage config, not once per chunk
+    pipeline = _pipelines.get(specs_key)
+    if pipeline is None:
+        pipeline = _pipelines[specs_key] = build_pipeline(json.loads(specs_key))
+    return pipeline
+
+
+def _process_chunk(specs_key, lines):
+    """Run one chunk through the pipeline (in a worker process)."""
+    records, times = _get_pipeline(specs_key)(lines)
+    output = list(records)
+    # Inclusive times -> each stage's own time
+    own = [t - (times[i - 1] if i else 0.0) for i, t in enumerate(times)]
+    return output, own
+
+
+def _chunks(lines, chunk_size):
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class RunStats:
+    """Counters for one run, printed as the exit report."""
+
+    def __init__(self, stage_names):
+        self.stage_names = stage_names
+        self.stage_seconds = [0.0] * len(stage_names)
+        self.records_in = 0
+        self.records_out = 0
+        self.chunks = 0
+        self.retries = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, n_in, output, stage_seconds):
+        self.chunks += 1
+        self.records_in += n_in
+        self.records_out += len(output)
+        for i, seconds in enumerate(stage_seconds):
+            self.stage_seconds[i] += seconds
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self):
+        return {
+            'records_in': self.records_in,
+            'records_out': self.records_out,
+            'chunks': self.chunks,
+            'retries': self.retries,
+            'elapsed_s': self.elapsed,
+            'records_per_s': self.records_in / self.elapsed if self.elapsed else 0.0,
+            'stages': {name: seconds for name, seconds in zip(self.stage_names, self.stage_seconds)},
+        }
+
+    def report(self):
+        rate = self.records_in / self.elapsed if self.elapsed else 0.0
+        print("-" * 60)
+        print(f"Records in/out: {self.records_in:,} / {self.records_out:,} "
+              f"in {self.chunks:,} chunks ({self.retries} retries)")
+        print(f"Elapsed: {self.elapsed:.3f}s  ->  {rate:,.0f} records/sec")
+        total = sum(self.stage_seconds) or 1.0
+        print(f"{'stage':<12} {'total s':>9} {'us/record':>10} {'share':>7}")
+        for name, seconds in zip(self.stage_names, self.stage_seconds):
+            per_record = seconds / self.records_in * 1e6 if self.records_in else 0.0
+            print(f"{name:<12} {seconds:9.3f} {per_record:10.2f} {seconds / total:7.1%}")
+        print("-" * 60)
+
+
+def run_pipeline(lines, specs, workers=1, chunk_size=5000, max_pending=None,
+                 sink=None, retry_attempts=0, timeout=None):
+    """
+    Stream ``lines`` through the configured stages in chunks.
+
+    With ``workers > 1`` chunks go to a process pool. At most
+    ``max_pending`` chunks are in flight; when the window is full the
+    reader waits for the oldest chunk, so a slow pipeline throttles input
+    instead of buffering the whole file. Output keeps input order.
+
+    Args:
+        lines (iterable): Input lines (read lazily)
+        specs (list): Stage specs from the config
+        workers (int): Worker processes (1 = run in this process)
+        chunk_size (int): Lines per chunk
+        max_pending (int): In-flight chunks (default: 2 per worker)
+        sink (callable): Called with each chunk's output list
+        retry_attempts (int): Resubmissions of a chunk whose worker failed
+        timeout (float): Seconds to wait for one chunk
+
+    Returns:
+        RunStats: Counters and per-stage seconds for the run
+    """
+    specs_key = json.dumps(specs, sort_keys=True)
+    stats = RunStats([spec['stage'] for spec in specs])
+    sink = sink or (lambda output: None)
+
+    if workers <= 1:
+        for chunk in _chunks(lines, chunk_size):
+            output, own = _process_chunk(specs_key, chunk)
+            stats.add(len(chunk), output, own)
+            sink(output)
+        return stats.finish()
+
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def drain_oldest():
+            chunk, future = pending.popleft()
+            for attempt in range(retry_attempts + 1):
+                try:
+                    output, own = future.result(timeout=timeout)
+                    break
+                except Exception:
+                    if attempt == retry_attempts:
+                        raise
+                    stats.retries += 1
+                    future = pool.submit(_process_chunk, specs_key, chunk)
+            stats.add(len(chunk), output, own)
+            sink(output)
+
+        for chunk in _chunks(lines, chunk_size):
+            if len(pending) >= max_pending:
+                drain_oldest()
+            pending.append((chunk, pool.submit(_process_chunk, specs_key, chunk)))
+        while pending:
+            drain_oldest()
+    return stats.finish()
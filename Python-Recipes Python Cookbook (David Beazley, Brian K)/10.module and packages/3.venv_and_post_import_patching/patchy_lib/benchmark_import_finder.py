@@ -0,0 +1,85 @@
+"""
+Import-time benchmark for patchy_lib.import_patch.
+
+Starts a fresh interpreter per run and times importing a batch of stdlib
+modules three ways: without the finder, with the finder and a couple of
+hooks, and with the finder and many exact and wildcard hooks (none of
+which match the imported modules, the common case at startup). Also
+microbenchmarks a single ``find_spec`` miss.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+MODULES = [
+    "json", "csv", "decimal", "fractions", "email.message", "email.utils",
+    "http.client", "urllib.request", "xml.etree.ElementTree", "logging.handlers",
+    "argparse", "asyncio", "sqlite3", "unittest", "zipfile", "tarfile",
+    "concurrent.futures", "multiprocessing.pool", "difflib", "pprint",
+]
+
+SETUPS = {
+    "no finder": "",
+    "finder, 2 hooks": (
+        "from patchy_lib.import_patch import post_import_hook\n"
+        "post_import_hook('math')(lambda m: None)\n"
+        "post_import_hook('numpy.*')(lambda m: None)\n"
+    ),
+    "finder, 200 hooks": (
+        "from patchy_lib.import_patch import post_import_hook\n"
+        "for i in range(100):\n"
+        "    post_import_hook(f'pkg{i}.mod')(lambda m: None)\n"
+        "    post_import_hook(f'pkg{i}.*')(lambda m: None)\n"
+    ),
+}
+
+# Import the finder module in every variant so only the hooks differ
+TEMPLATE = """
+import time
+import patchy_lib
+{setup}
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print(time.perf_counter() - start)
+"""
+
+RUNS = 15
+
+
+def time_imports(setup):
+    code = TEMPLATE.format(setup=setup, modules=MODULES)
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)),
+               PYTHONDONTWRITEBYTECODE="1")
+    results = []
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", code], env=env,
+                             capture_output=True, text=True, check=True)
+        results.append(float(out.stdout) * 1000)
+    return results
+
+
+print("=" * 60)
+print(f"Importing {len(MODULES)} stdlib modules ({RUNS} fresh interpreters each)")
+print("=" * 60)
+print(f"{'setup':20s} {'median ms':>10s} {'min ms':>10s}")
+print("-" * 42)
+for label, setup in SETUPS.items():
+    results = time_imports(setup)
+    print(f"{label:20s} {statistics.median(results):10.2f} {min(results):10.2f}")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from patchy_lib.import_patch import PostImportFinder
+
+finder = PostImportFinder()
+for i in range(100):
+    finder.register(f"pkg{i}.mod", None)
+    finder.register(f"pkg{i}.*", None)
+
+number = 1_000_000
+miss = min(timeit.repeat(lambda: finder.find_spec("xml.etree.ElementTree", None), number=number, repeat=3))
+wildcard = min(timeit.repeat(lambda: finder.hooks_for("pkg7.a.b"), number=number, repeat=3))
+print(f"\nfind_spec miss (200 hooks):  {miss / number * 1e9:6.0f} ns")
+print(f"hooks_for wildcard match:    {wildcard / number * 1e9:6.0f} ns")
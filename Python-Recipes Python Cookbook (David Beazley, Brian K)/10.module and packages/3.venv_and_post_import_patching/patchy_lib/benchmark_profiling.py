@@ -0,0 +1,62 @@
+"""
+Overhead benchmark for patchy_lib.profiling.
+
+Times functions of increasing cost before and after they are wrapped by
+the profiler and prints the per-call overhead in ns and percent, once
+timing every call and once timing 1 call in 16 (``sample_every=16``).
+"""
+import sys
+import timeit
+import types
+
+from patchy_lib.profiling import instrument
+
+SOURCE = '''
+def tiny(x):
+    return x
+
+def small(x):
+    return sum(range(100))
+
+def medium(x):
+    return sum(range(2_000))
+
+def heavy(x):
+    return sorted(str(i) for i in range(20_000))
+'''
+
+targets = types.ModuleType("bench_targets")
+exec(SOURCE, targets.__dict__)
+sys.modules["bench_targets"] = targets
+
+names = ["tiny", "small", "medium", "heavy"]
+originals = {name: getattr(targets, name) for name in names}
+
+
+def per_call_ns(func, number):
+    best = min(timeit.repeat(lambda: func(1), number=number, repeat=3))
+    return best / number * 1e9
+
+
+numbers = {}
+for name in names:
+    # Enough calls for roughly 0.2s per timing run
+    numbers[name] = max(10, int(0.2e9 / max(per_call_ns(originals[name], 100), 1)))
+
+for sample_every in (1, 16):
+    profiler = instrument([f"bench_targets:{name}" for name in names], sample_every=sample_every)
+    wrapped = {name: getattr(targets, name) for name in names}
+    # Put the originals back so the next round wraps them, not the wrappers
+    for name in names:
+        setattr(targets, name, originals[name])
+
+    print(f"\nsample_every={sample_every}")
+    print(f"{'function':10s} {'base ns':>12s} {'wrapped ns':>12s} {'overhead ns':>12s} {'overhead':>10s}")
+    print("-" * 60)
+    for name in names:
+        base = min(per_call_ns(originals[name], numbers[name]) for _ in range(3))
+        timed = min(per_call_ns(wrapped[name], numbers[name]) for _ in range(3))
+        print(f"{name:10s} {base:12.0f} {timed:12.0f} {timed - base:12.0f} {(timed - base) / base:9.1%}")
+
+    stats = profiler.snapshot()
+    print(f"Recorded calls: { {t.split(':')[1]: s['calls'] for t, s in stats.items()} }")
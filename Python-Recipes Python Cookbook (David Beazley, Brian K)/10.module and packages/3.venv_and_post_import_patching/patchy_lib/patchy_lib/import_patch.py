@@ -5,30 +5,68 @@ import importlib.util
 
 
 class PostImportFinder(importlib.abc.MetaPathFinder):
+    # Hooks are keyed either by an exact module name ("math") or by a
+    # package wildcard ("numpy.*" matches numpy.linalg, numpy.fft.helper,
+    # ... but not numpy itself). Hooks are kept after they run, so a module
+    # that is reloaded or re-imported gets patched again.
+
     def __init__(self):
         self._hooks = {}
+        self._wildcards = {}
+        self._roots = frozenset()
+        self._finders = {}
 
     def register(self, name, hook):
-        self._hooks.setdefault(name, []).append(hook)
+        if name.endswith(".*"):
+            self._wildcards.setdefault(name[:-2], []).append(hook)
+        else:
+            self._hooks.setdefault(name, []).append(hook)
+        # Top-level package names with any hook: one set lookup rejects
+        # almost every import in the process
+        self._roots = frozenset(
+            key.partition(".")[0] for key in (*self._hooks, *self._wildcards)
+        )
+
+    def hooks_for(self, fullname):
+        hooks = list(self._hooks.get(fullname, ()))
+        if self._wildcards:
+            parent = fullname
+            while "." in parent:
+                parent = parent.rpartition(".")[0]
+                hooks.extend(self._wildcards.get(parent, ()))
+        return hooks
 
     def find_spec(self, fullname, path, target=None):
-        if fullname not in self._hooks:
+        if fullname.partition(".")[0] not in self._roots:
+            return None
+        hooks = self.hooks_for(fullname)
+        if not hooks:
             return None
 
+        spec = self._find_real_spec(fullname, path, target)
+        if spec is None or spec.loader is None:
+            return None
+
+        spec.loader = PostImportLoader(spec.loader, hooks)
+        return spec
+
+    def _find_real_spec(self, fullname, path, target):
+        # Try the finder that resolved this module last time first, so a
+        # reload doesn't walk the whole meta path again
+        cached = self._finders.get(fullname)
+        if cached is not None and cached in sys.meta_path:
+            spec = cached.find_spec(fullname, path, target)
+            if spec is not None:
+                return spec
+
         for finder in sys.meta_path:
-            if finder is self:
+            if finder is self or finder is cached or not hasattr(finder, "find_spec"):
                 continue
             spec = finder.find_spec(fullname, path, target)
             if spec is not None:
-                break
-        else:
-            return None
-
-        original_loader = spec.loader
-        hooks = self._hooks.pop(fullname)
-
-        spec.loader = PostImportLoader(original_loader, hooks)
-        return spec
+                self._finders[fullname] = finder
+                return spec
+        return None
 
 
 class PostImportLoader(importlib.abc.Loader):
@@ -42,6 +80,10 @@ class PostImportLoader(importlib.abc.Loader):
         return None
 
     def exec_module(self, module):
+        # Reload looks the spec up again, so it comes back through the
+        # finder and unwraps to the real loader here each time
+        module.__spec__.loader = self.loader
+        module.__loader__ = self.loader
         self.loader.exec_module(module)
         for hook in self.hooks:
             hook(module)
@@ -53,9 +95,13 @@ sys.meta_path.insert(0, _finder)
 
 def post_import_hook(module_name):
     def decorator(func):
-        if module_name in sys.modules:
+        _finder.register(module_name, func)
+        if module_name.endswith(".*"):
+            prefix = module_name[:-1]
+            for name, module in list(sys.modules.items()):
+                if name.startswith(prefix) and module is not None:
+                    func(module)
+        elif module_name in sys.modules:
             func(sys.modules[module_name])
-        else:
-            _finder.register(module_name, func)
         return func
-    return decorator
\ No newline at end of file
+    return decorator
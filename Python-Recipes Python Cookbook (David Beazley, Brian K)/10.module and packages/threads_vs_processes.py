@@ -1,18 +1,361 @@
+"""
+Threads vs Processes vs NumPy: CPU-bound executor benchmark
+File: threads_vs_processes.py
+Purpose: Pick a backend for CPU-bound jobs from measurements, not one noisy number
+
+The old version timed ``n * n`` over 1000 items once per pool, which mostly
+measured pickling and IPC. This harness runs a real CPU-bound kernel and
+sweeps:
+
+- workload size (items) and work per item (kernel iterations)
+- task granularity (items per task, i.e. chunksize)
+- worker count
+- backend: serial, threads, processes, processes with shared-memory
+  inputs/outputs, and vectorized NumPy
+
+Each configuration gets warm-up runs and then ``--repeat`` timed runs; pools
+are created once per (backend, workers) and their startup time is reported
+separately. Results (median, p95, items/sec) are printed as a table and
+written as JSON.
+
+Usage:
+    python threads_vs_processes.py
+    python threads_vs_processes.py --sizes 10000 100000 --work 50 200 \\
+        --chunksizes 100 1000 --workers 1 2 4 --repeat 7 --output results.json
+"""
+
+import argparse
+import array
+import json
+import os
+import platform
+import statistics
+import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 
-def heavy_math(n):
-    return n * n
+try:
+    import numpy as np
+except ImportError:  # the numpy backend is skipped without it
+    np = None
 
-if __name__ == "__main__":
-    numbers = range(1, 1001)
+# Keeps x*x + n inside int64 so the NumPy kernel gives the same answer
+MODULUS = 1_000_003
+BACKENDS = ["serial", "threads", "processes", "shm", "numpy"]
+
+
+# ============================================================================
+# Kernel
+# ============================================================================
+
+def heavy_math(n, work):
+    """
+    Iterate ``x = (x*x + n) % MODULUS`` ``work`` times, starting from n.
+
+    Each step depends on the previous one, so the loop can't be skipped,
+    and the same arithmetic vectorizes across items with NumPy.
+    """
+    x = n
+    for _ in range(work):
+        x = (x * x + n) % MODULUS
+    return x
+
+
+def heavy_math_chunk(numbers, work):
+    return [heavy_math(n, work) for n in numbers]
+
+
+def heavy_math_numpy(numbers, work):
+    n = np.asarray(numbers, dtype=np.int64)
+    x = n.copy()
+    for _ in range(work):
+        x *= x
+        x += n
+        x %= MODULUS
+    return x
+
+
+# ============================================================================
+# Shared-memory workers
+# ============================================================================
+
+_shm = {}
+
+
+def _attach_shared(in_name, out_name):
+    # Pool initializer: attach both blocks once per worker, not per task
+    _shm["in"] = shared_memory.SharedMemory(name=in_name)
+    _shm["out"] = shared_memory.SharedMemory(name=out_name)
+
+
+def _shared_chunk(start, stop, work):
+    # Only (start, stop) crosses the process boundary; data stays in place
+    inputs = _shm["in"].buf.cast("q")
+    outputs = _shm["out"].buf.cast("q")
+    try:
+        for i in range(start, stop):
+            outputs[i] = heavy_math(inputs[i], work)
+    finally:
+        inputs.release()
+        outputs.release()
+
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+def _chunks(size, chunksize):
+    return [(start, min(start + chunksize, size)) for start in range(0, size, chunksize)]
+
+
+class Backend:
+    """
+    One backend at one worker count. ``start`` builds the pool (timed
+    separately), ``run`` does one timed pass and returns the results.
+    """
+
+    name = "serial"
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = None
+
+    def start(self, numbers):
+        self.numbers = numbers
+
+    def run(self, work, chunksize):
+        return heavy_math_chunk(self.numbers, work)
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+class ThreadBackend(Backend):
+    name = "threads"
 
-    start = time.time()
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        results = list(pool.map(heavy_math, numbers))
-    print(f"Threads took: {time.time() - start:.4f}s")
+    def start(self, numbers):
+        super().start(numbers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
 
-    start = time.time()
-    with ProcessPoolExecutor(max_workers=4) as pool:
-        results = list(pool.map(heavy_math, numbers))
-    print(f"Processes took: {time.time() - start:.4f}s")
\ No newline at end of file
+    def run(self, work, chunksize):
+        numbers = self.numbers
+        parts = self.pool.map(
+            lambda bounds: heavy_math_chunk(numbers[bounds[0]:bounds[1]], work),
+            _chunks(len(numbers), chunksize),
+        )
+        return [x for part in parts for x in part]
+
+
+class ProcessBackend(Backend):
+    name = "processes"
+
+    def start(self, numbers):
+        super().start(numbers)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Fork the workers now so their startup isn't in the first run
+        list(self.pool.map(abs, range(self.workers)))
+
+    def run(self, work, chunksize):
+        # Every chunk's inputs and results are pickled both ways
+        numbers = self.numbers
+        slices = [numbers[a:b] for a, b in _chunks(len(numbers), chunksize)]
+        parts = self.pool.map(heavy_math_chunk, slices, [work] * len(slices))
+        return [x for part in parts for x in part]
+
+
+class SharedMemoryBackend(Backend):
+    name = "shm"
+
+    def start(self, numbers):
+        super().start(numbers)
+        nbytes = max(len(numbers), 1) * 8
+        self.shm_in = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.shm_out = shared_memory.SharedMemory(create=True, size=nbytes)
+        view = self.shm_in.buf.cast("q")
+        view[:len(numbers)] = array.array("q", numbers)
+        view.release()
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_attach_shared,
+            initargs=(self.shm_in.name, self.shm_out.name),
+        )
+        list(self.pool.map(abs, range(self.workers)))
+
+    def run(self, work, chunksize):
+        bounds = _chunks(len(self.numbers), chunksize)
+        starts, stops = zip(*bounds) if bounds else ((), ())
+        list(self.pool.map(_shared_chunk, starts, stops, [work] * len(bounds)))
+        view = self.shm_out.buf.cast("q")
+        try:
+            return view[:len(self.numbers)].tolist()
+        finally:
+            view.release()
+
+    def stop(self):
+        super().stop()
+        for shm in (self.shm_in, self.shm_out):
+            shm.close()
+            shm.unlink()
+
+
+class NumpyBackend(Backend):
+    name = "numpy"
+
+    def start(self, numbers):
+        self.numbers = np.asarray(numbers, dtype=np.int64)
+        if self.workers > 1:
+            # NumPy releases the GIL inside ufuncs, so threads do scale here
+            self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def run(self, work, chunksize):
+        # Chunking still matters with one worker: small chunks stay in cache
+        numbers = self.numbers
+        kernel = lambda bounds: heavy_math_numpy(numbers[bounds[0]:bounds[1]], work)
+        bounds = _chunks(len(numbers), chunksize)
+        parts = map(kernel, bounds) if self.pool is None else self.pool.map(kernel, bounds)
+        return np.concatenate(list(parts)).tolist()
+
+
+BACKEND_CLASSES = {cls.name: cls for cls in
+                   (Backend, ThreadBackend, ProcessBackend, SharedMemoryBackend, NumpyBackend)}
+
+
+# ============================================================================
+# Harness
+# ============================================================================
+
+def percentile(values, pct):
+    """Nearest-rank percentile (no interpolation), fine for small samples."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_sweep(sizes, works, chunksizes, workers_list, backends, repeat=5, warmup=1):
+    """
+    Time every (size, work, backend, workers, chunksize) combination.
+
+    Args:
+        sizes (list): Item counts
+        works (list): Kernel iterations per item
+        chunksizes (list): Items per task
+        workers_list (list): Worker counts
+        backends (list): Names from BACKENDS
+        repeat (int): Timed runs per combination
+        warmup (int): Untimed runs before those
+
+    Returns:
+        list: One dict per combination with timings and throughput
+    """
+    results = []
+    for size in sizes:
+        numbers = list(range(1, size + 1))
+        for work in works:
+            expected = heavy_math_chunk(numbers[:1000], work)
+            for name in backends:
+                # Serial has no pool, so worker count and chunking don't apply
+                for workers in ([1] if name == "serial" else workers_list):
+                    backend = BACKEND_CLASSES[name](workers)
+                    t0 = time.perf_counter()
+                    backend.start(numbers)
+                    startup = time.perf_counter() - t0
+                    try:
+                        for chunksize in ([size] if name == "serial" else chunksizes):
+                            for _ in range(warmup):
+                                out = backend.run(work, chunksize)
+                            times = []
+                            for _ in range(repeat):
+                                t0 = time.perf_counter()
+                                out = backend.run(work, chunksize)
+                                times.append(time.perf_counter() - t0)
+                            if out[:1000] != expected:
+                                raise AssertionError(f"{name} returned wrong results")
+                            median = statistics.median(times)
+                            row = {
+                                "size": size, "work": work, "backend": name,
+                                "workers": workers, "chunksize": chunksize,
+                                "startup_s": startup, "median_s": median,
+                                "p95_s": percentile(times, 95),
+                                "min_s": min(times), "items_per_s": size / median,
+                                "times_s": times,
+                            }
+                            results.append(row)
+                            print(f"{size:>9,} {work:>5} {name:>10} {workers:>7} {chunksize:>9,} "
+                                  f"{median * 1000:>10.2f} {row['p95_s'] * 1000:>10.2f} "
+                                  f"{row['items_per_s']:>12,.0f} {startup * 1000:>9.1f}")
+                    finally:
+                        backend.stop()
+    return results
+
+
+def summarize(results):
+    """Print the fastest configuration for every (size, work) pair."""
+    print("\n" + "=" * 80)
+    print("FASTEST CONFIGURATION PER WORKLOAD")
+    print("=" * 80)
+    best = {}
+    for row in results:
+        key = (row["size"], row["work"])
+        if key not in best or row["median_s"] < best[key]["median_s"]:
+            best[key] = row
+    for (size, work), row in sorted(best.items()):
+        serial = next((r for r in results if r["backend"] == "serial"
+                       and (r["size"], r["work"]) == (size, work)), None)
+        speedup = f"{serial['median_s'] / row['median_s']:.1f}x vs serial" if serial else ""
+        print(f"size={size:,} work={work}: {row['backend']} workers={row['workers']} "
+              f"chunksize={row['chunksize']:,} -> {row['median_s'] * 1000:.2f} ms  {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU-bound executor benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--work", type=int, nargs="+", default=[20, 200],
+                        help="Kernel iterations per item")
+    parser.add_argument("--chunksizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", default="executor_benchmark.json",
+                        help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    backends = args.backends
+    if np is None and "numpy" in backends:
+        print("NumPy not installed - skipping the numpy backend")
+        backends = [b for b in backends if b != "numpy"]
+
+    print("=" * 80)
+    print(f"CPU-BOUND EXECUTOR BENCHMARK ({os.cpu_count()} CPUs, Python {platform.python_version()})")
+    print("=" * 80)
+    print(f"{'size':>9} {'work':>5} {'backend':>10} {'workers':>7} {'chunksize':>9} "
+          f"{'median ms':>10} {'p95 ms':>10} {'items/s':>12} {'start ms':>9}")
+    print("-" * 88)
+
+    results = run_sweep(args.sizes, args.work, args.chunksizes, args.workers,
+                        backends, repeat=args.repeat, warmup=args.warmup)
+    summarize(results)
+
+    report = {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__ if np is not None else None,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "kernel": f"x = (x*x + n) % {MODULUS}, repeated `work` times",
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+Event-loop TCP echo + UDP time server
+File: event_server.py
+Purpose: Serve the EchoHandler/TimeHandler protocols from one selectors loop
+
+11.Networking and web programming.ipynb runs EchoHandler on a TCPServer
+and TimeHandler on a UDPServer, each a single-threaded socketserver in
+its own thread, and EchoHandler answers one recv(1024) per connection.
+EventServer serves both protocols from one process:
+
+- one selectors loop for the TCP listener, every TCP connection and the
+  UDP socket
+- echo is a real stream echo: whatever arrives is written back, with
+  partial sends buffered per connection and reading paused while a
+  client's unsent backlog is over ``max_pending`` (back-pressure)
+- every read goes through recv_into/recvfrom_into on one preallocated
+  bytearray; data is only copied when a send comes up short
+- at ``max_connections`` the listener is unregistered, so extra clients
+  wait in the kernel backlog instead of being accepted and starved
+- is_authd() caches its CIDR check per client IP
+- ``processes > 1`` runs one loop per process on SO_REUSEPORT sockets
+  and lets the kernel spread connections and datagrams
+
+Usage:
+    python event_server.py serve --allow 127.0.0.0/8 192.168.1.0/24
+    python event_server.py serve --processes 4
+    python event_server.py load --connections 50 --requests 2000
+    python event_server.py load --udp --port 20001
+    python event_server.py bench
+"""
+
+import argparse
+import functools
+import ipaddress
+import multiprocessing
+import selectors
+import socket
+import threading
+import time
+from socketserver import BaseRequestHandler, TCPServer
+
+AUTH_NETWORKS = (ipaddress.ip_network('192.168.1.0/24'),)
+
+
+@functools.lru_cache(maxsize=65536)
+def is_authd(ip_str, networks=AUTH_NETWORKS):
+    """True if ``ip_str`` is inside one of ``networks`` (cached per IP)."""
+    addr = ipaddress.ip_address(ip_str)
+    return any(addr in net for net in networks)
+
+
+def parse_networks(cidrs):
+    """CIDR strings -> hashable tuple for is_authd (None = allow everyone)."""
+    if not cidrs:
+        return None
+    return tuple(ipaddress.ip_network(c, strict=False) for c in cidrs)
+
+
+# ============================================================================
+# The notebook handler (benchmark baseline)
+# ============================================================================
+
+class EchoHandler(BaseRequestHandler):
+    def handle(self):
+        data = self.request.recv(1024)
+        if data:
+            self.request.send(data)
+
+
+# ============================================================================
+# Event-loop server
+# ============================================================================
+
+class _Conn:
+    __slots__ = ('sock', 'out', 'events', 'closing', 'callback')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.out = bytearray()   # echo bytes the kernel hasn't taken yet
+        self.events = selectors.EVENT_READ
+        self.closing = False     # peer finished sending; close once flushed
+        self.callback = None
+
+
+def _bind(kind, address, reuse_port):
+    sock = socket.socket(socket.AF_INET, kind)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            raise OSError("SO_REUSEPORT is not available on this platform")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(address)
+    if kind == socket.SOCK_STREAM:
+        sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+class EventServer:
+    """
+    TCP echo and UDP time server on one selectors loop.
+
+    Args:
+        tcp_address (tuple): Echo address, or None to disable
+        udp_address (tuple): Time address, or None to disable
+        max_connections (int): Open TCP connections before accept pauses
+        buffer_size (int): Size of the shared receive buffer
+        max_pending (int): Unsent echo bytes per client before reading pauses
+        allow (tuple): Networks from parse_networks(); None allows everyone
+        reuse_port (bool): Bind with SO_REUSEPORT (multi-process mode)
+    """
+
+    def __init__(self, tcp_address=('', 20000), udp_address=('', 20001), max_connections=1024,
+                 buffer_size=65536, max_pending=1 << 20, allow=None, reuse_port=False, verbose=True):
+        self.max_connections = max_connections
+        self.max_pending = max_pending
+        self.allow = allow
+        self.verbose = verbose
+        self.sel = selectors.DefaultSelector()
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._ctime_sec, self._ctime = None, b''
+        self.conns = {}
+        self.stats = dict(accepted=0, rejected=0, closed=0, echoed_bytes=0, datagrams=0, paused=0)
+        self.tcp = self.udp = None
+        if tcp_address is not None:
+            self.tcp = _bind(socket.SOCK_STREAM, tcp_address, reuse_port)
+            self.sel.register(self.tcp, selectors.EVENT_READ, self._accept)
+            self._accepting = True
+        if udp_address is not None:
+            self.udp = _bind(socket.SOCK_DGRAM, udp_address, reuse_port)
+            self.sel.register(self.udp, selectors.EVENT_READ, self._on_datagram)
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    # -- TCP ------------------------------------------------------------------
+
+    def _accept(self, listener, mask):
+        while len(self.conns) < self.max_connections:
+            try:
+                sock, addr = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return  # e.g. EMFILE; retried on the next readiness event
+            if self.allow is not None and not is_authd(addr[0], self.allow):
+                self.stats['rejected'] += 1
+                sock.close()
+                continue
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = _Conn(sock)
+            conn.callback = functools.partial(self._on_conn, conn)
+            self.sel.register(sock, selectors.EVENT_READ, conn.callback)
+            self.conns[sock] = conn
+            self.stats['accepted'] += 1
+        # Full: stop accepting until a connection closes
+        self.sel.unregister(listener)
+        self._accepting = False
+        self.stats['paused'] += 1
+
+    def _close(self, conn):
+        self.sel.unregister(conn.sock)
+        conn.sock.close()
+        del self.conns[conn.sock]
+        self.stats['closed'] += 1
+        if self.tcp is not None and not self._accepting:
+            self.sel.register(self.tcp, selectors.EVENT_READ, self._accept)
+            self._accepting = True
+
+    def _on_conn(self, conn, sock, mask):
+        try:
+            if mask & selectors.EVENT_READ:
+                n = sock.recv_into(self._buf)
+                if n == 0:
+                    conn.closing = True
+                else:
+                    self.stats['echoed_bytes'] += n
+                    if conn.out:
+                        conn.out += self._view[:n]  # keep order behind the backlog
+                    else:
+                        try:
+                            sent = sock.send(self._view[:n])
+                        except (BlockingIOError, InterruptedError):
+                            sent = 0  # the shared buffer is reused: queue it all
+                        if sent < n:
+                            conn.out += self._view[sent:n]
+            if mask & selectors.EVENT_WRITE and conn.out:
+                sent = sock.send(conn.out)
+                del conn.out[:sent]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._close(conn)  # reset by peer, broken pipe, ...
+            return
+
+        events = 0
+        if not conn.closing and len(conn.out) < self.max_pending:
+            events |= selectors.EVENT_READ
+        if conn.out:
+            events |= selectors.EVENT_WRITE
+        if not events:
+            self._close(conn)
+        elif events != conn.events:
+            conn.events = events
+            self.sel.modify(sock, events, conn.callback)
+
+    # -- UDP ------------------------------------------------------------------
+
+    def _on_datagram(self, sock, mask):
+        # Bounded burst so a datagram flood can't starve the TCP clients
+        for _ in range(64):
+            try:
+                n, addr = sock.recvfrom_into(self._buf)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                continue  # e.g. ICMP port unreachable from an earlier reply
+            if self.allow is not None and not is_authd(addr[0], self.allow):
+                self.stats['rejected'] += 1
+                continue
+            # time.ctime() only changes once a second
+            now = int(time.time())
+            if now != self._ctime_sec:
+                self._ctime_sec, self._ctime = now, time.ctime(now).encode('ascii')
+            try:
+                sock.sendto(self._ctime, addr)
+            except OSError:
+                pass  # UDP is lossy anyway; the client retries
+            self.stats['datagrams'] += 1
+
+    # -- loop -----------------------------------------------------------------
+
+    def serve_forever(self, stop=None, poll_interval=0.5):
+        if self.tcp is not None:
+            self.log(f"TCP Echo server on port {self.tcp.getsockname()[1]}")
+        if self.udp is not None:
+            self.log(f"UDP Time server on port {self.udp.getsockname()[1]}")
+        try:
+            while stop is None or not stop.is_set():
+                for key, mask in self.sel.select(poll_interval):
+                    key.data(key.fileobj, mask)
+        finally:
+            self.close()
+
+    def close(self):
+        for conn in list(self.conns.values()):
+            self._close(conn)
+        for sock in (self.tcp, self.udp):
+            if sock is not None:
+                try:
+                    self.sel.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+                sock.close()
+        self.sel.close()
+
+
+def _serve_child(kwargs):
+    try:
+        EventServer(**kwargs).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(processes=1, **kwargs):
+    """Run EventServer in this process, or in ``processes`` SO_REUSEPORT children."""
+    if processes <= 1:
+        try:
+            EventServer(**kwargs).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+    kwargs['reuse_port'] = True
+    children = [multiprocessing.Process(target=_serve_child, args=(dict(kwargs, verbose=(i == 0)),))
+                for i in range(processes)]
+    for p in children:
+        p.start()
+    print(f"{processes} processes sharing the ports with SO_REUSEPORT")
+    try:
+        for p in children:
+            p.join()
+    except KeyboardInterrupt:
+        for p in children:
+            p.terminate()
+            p.join()
+
+
+# ============================================================================
+# Load-test client
+# ============================================================================
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _recv_exactly(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            break
+        got += k
+    return got
+
+
+def _tcp_client(address, requests, payload, new_connection, latencies, errors):
+    sock = None
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                if sock is None:
+                    sock = socket.create_connection(address)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.sendall(payload)
+                if _recv_exactly(sock, len(payload)) != len(payload):
+                    raise ConnectionError("short echo")
+            except OSError:
+                errors.append(1)
+                if sock is not None:
+                    sock.close()
+                sock = None
+                continue
+            latencies.append(time.perf_counter() - start)
+            if new_connection:
+                sock.close()
+                sock = None
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+def _udp_client(address, requests, latencies, errors):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(1.0)
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                sock.sendto(b'', address)
+                sock.recvfrom(128)
+            except OSError:
+                errors.append(1)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+
+def load_test(address, connections=50, requests=1000, size=64, udp=False, new_connection=False):
+    """
+    Hammer a server from ``connections`` client threads.
+
+    Returns:
+        dict: requests, errors, seconds, rps, p50_ms, p99_ms
+    """
+    payload = b'x' * size
+    latencies, errors = [], []
+    if udp:
+        threads = [threading.Thread(target=_udp_client, args=(address, requests, latencies, errors))
+                   for _ in range(connections)]
+    else:
+        threads = [threading.Thread(target=_tcp_client,
+                                    args=(address, requests, payload, new_connection, latencies, errors))
+                   for _ in range(connections)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return dict(requests=len(latencies), errors=len(errors), seconds=elapsed,
+                rps=len(latencies) / elapsed,
+                p50_ms=_percentile(latencies, 50) * 1e3, p99_ms=_percentile(latencies, 99) * 1e3)
+
+
+def _report(label, r):
+    print(f"{label:<40} {r['rps']:>10,.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _serve_original(pipe):
+    with TCPServer(('127.0.0.1', 0), EchoHandler) as srv:
+        pipe.send(srv.server_address[1])
+        srv.serve_forever()
+
+
+def _serve_event(pipe, kwargs):
+    server = EventServer(verbose=False, **kwargs)
+    pipe.send((server.tcp.getsockname()[1], server.udp.getsockname()[1]))
+    server.serve_forever()
+
+
+def _start(target, *args):
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=target, args=(child,) + args, daemon=True)
+    proc.start()
+    return proc, parent.recv()
+
+
+def benchmark(connections, requests, size):
+    print("=" * 80)
+    print(f"ECHO/TIME BENCHMARK: {connections} client threads x {requests} requests, {size}-byte payload")
+    print("=" * 80)
+    print(f"{'server / mode':<40} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    print("-" * 80)
+
+    orig, port = _start(_serve_original)
+    _report("socketserver TCPServer, conn/request",
+            load_test(('127.0.0.1', port), connections, requests, size, new_connection=True))
+    orig.terminate()
+
+    event, (tcp_port, udp_port) = _start(
+        _serve_event, dict(tcp_address=('127.0.0.1', 0), udp_address=('127.0.0.1', 0)))
+    _report("EventServer, conn/request",
+            load_test(('127.0.0.1', tcp_port), connections, requests, size, new_connection=True))
+    _report("EventServer, keep-alive stream",
+            load_test(('127.0.0.1', tcp_port), connections, requests, size))
+    _report("EventServer, keep-alive, 64 KB payload",
+            load_test(('127.0.0.1', tcp_port), min(connections, 8), max(requests // 10, 10), 65536))
+    _report("EventServer, UDP time",
+            load_test(('127.0.0.1', udp_port), connections, requests, udp=True))
+    event.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop echo/time server and load client")
+    parser.add_argument('mode', choices=['serve', 'load', 'bench'])
+    parser.add_argument('--host', default='127.0.0.1', help="load: server host")
+    parser.add_argument('--port', type=int, default=20000, help="load: server port")
+    parser.add_argument('--tcp-port', type=int, default=20000)
+    parser.add_argument('--udp-port', type=int, default=20001)
+    parser.add_argument('--max-connections', type=int, default=1024)
+    parser.add_argument('--allow', nargs='+', help="serve: allowed CIDRs (default: everyone)")
+    parser.add_argument('--processes', type=int, default=1, help="serve: SO_REUSEPORT processes")
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=1000, help="requests per connection")
+    parser.add_argument('--size', type=int, default=64)
+    parser.add_argument('--udp', action='store_true', help="load: query the UDP time server")
+    parser.add_argument('--new-connection', action='store_true', help="load: reconnect per request")
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        serve(args.processes, tcp_address=('', args.tcp_port), udp_address=('', args.udp_port),
+              max_connections=args.max_connections, allow=parse_networks(args.allow))
+    elif args.mode == 'load':
+        result = load_test((args.host, args.port), args.connections, args.requests, args.size,
+                           udp=args.udp, new_connection=args.new_connection)
+        print(f"{result['requests']:,} requests in {result['seconds']:.2f}s: {result['rps']:,.0f} req/s, "
+              f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, {result['errors']} errors")
+    else:
+        benchmark(args.connections, args.requests, args.size)
+
+
+if __name__ == "__main__":
+    main()
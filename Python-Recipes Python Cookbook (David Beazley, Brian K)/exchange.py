@@ -0,0 +1,467 @@
+"""
+Back-pressured publish/subscribe exchange
+File: exchange.py
+Purpose: Fan messages out to many subscribers without one slow subscriber stalling the rest
+
+The Exchange in 12.concurrency.ipynb calls every subscriber in turn inside
+send(), so the publisher runs at the speed of the slowest subscriber.
+This Exchange keeps the same attach/detach/send interface, but:
+
+- every subscriber gets its own bounded mailbox with an overflow policy:
+    block        the publisher waits for room (lossless back-pressure)
+    drop_oldest  the oldest waiting message is discarded
+    coalesce     a waiting message with the same key is replaced by the
+                 newer one (latest-value semantics, e.g. prices, status)
+- a small pool of delivery threads drains mailboxes that have work; a
+  mailbox is drained by one thread at a time, so each subscriber still
+  sees its messages in order and is never called concurrently
+- publish() takes a batch and enqueues it into each mailbox under one
+  lock acquisition; ``batch=True`` subscribers receive lists
+- topic routing uses an index (topic -> mailboxes) rebuilt on
+  attach/detach, so publishing is one dict lookup
+
+Usage:
+    exc = Exchange(workers=4)
+    exc.attach(police_radio, topics=["traffic"])
+    exc.attach(ticker_view, policy="coalesce", key=lambda m: m[0])
+    exc.send("Traffic is jammed", topic="traffic")
+    exc.close()
+
+    python exchange.py bench
+"""
+
+import argparse
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+# ============================================================================
+# The original synchronous exchange
+# ============================================================================
+
+class SyncExchange:
+    def __init__(self):
+        self._subscribers = set()
+
+    def attach(self, task):
+        self._subscribers.add(task)
+    def detach(self, task):
+        self._subscribers.remove(task)
+
+    def send(self, msg):
+        for subscriber in self._subscribers:
+            subscriber(msg)
+
+
+# ============================================================================
+# Mailboxes
+# ============================================================================
+
+def _print_error(task, msg, exc):
+    print(f"Exchange: subscriber {task!r} failed on {msg!r}")
+    traceback.print_exception(exc)
+
+
+class _Mailbox:
+    """Bounded queue in front of one subscriber."""
+
+    def __init__(self, task, ready, on_error, maxsize, policy, key, batch):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.task = task
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key or (lambda msg: None)
+        self.batch = batch
+        self.delivered = self.dropped = self.coalesced = self.errors = 0
+        if policy == COALESCE:
+            self._items = OrderedDict()
+        elif policy == DROP_OLDEST:
+            self._items = deque(maxlen=maxsize)
+        else:
+            self._items = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._ready = ready
+        self._on_error = on_error
+        self._scheduled = False  # queued on (or being drained by) a worker
+        self._closed = False
+
+    def _schedule(self):
+        if self._items and not self._scheduled:
+            self._scheduled = True
+            self._ready.put(self)
+
+    def put_many(self, msgs, deadline=None):
+        with self._cond:
+            if self._closed:
+                return
+            items = self._items
+            if self.policy == DROP_OLDEST:
+                overflow = len(items) + len(msgs) - self.maxsize
+                if overflow > 0:
+                    self.dropped += overflow
+                items.extend(msgs)  # the deque's maxlen drops from the left
+            elif self.policy == COALESCE:
+                key = self.key
+                for msg in msgs:
+                    k = key(msg)
+                    if k in items:
+                        self.coalesced += 1  # replaced in place, keeps its turn
+                    elif len(items) >= self.maxsize:
+                        items.popitem(last=False)
+                        self.dropped += 1
+                    items[k] = msg
+            else:
+                pos = 0
+                while pos < len(msgs):
+                    room = self.maxsize - len(items)
+                    if room > 0:
+                        items.extend(msgs[pos:pos + room])
+                        pos += room
+                        continue
+                    # Full: make sure a worker is draining, then wait for room
+                    self._schedule()
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if (timeout is not None and timeout <= 0) or not self._cond.wait(timeout):
+                        raise queue.Full(f"subscriber {self.task!r} is full")
+                    if self._closed:
+                        return
+            self._schedule()
+
+    def drain(self, max_batch):
+        """Worker side: deliver up to ``max_batch`` waiting messages."""
+        with self._cond:
+            items = self._items
+            n = min(len(items), max_batch)
+            if self.policy == COALESCE:
+                msgs = [items.popitem(last=False)[1] for _ in range(n)]
+            else:
+                msgs = [items.popleft() for _ in range(n)]
+            if self.policy == BLOCK:
+                self._cond.notify_all()  # room for blocked publishers
+
+        task = self.task
+        if self.batch:
+            try:
+                task(msgs)
+            except Exception as e:
+                self.errors += 1
+                self._on_error(task, msgs, e)
+        else:
+            for msg in msgs:
+                try:
+                    task(msg)
+                except Exception as e:
+                    self.errors += 1
+                    self._on_error(task, msg, e)
+
+        with self._cond:
+            self.delivered += len(msgs)
+            if self._closed:
+                items.clear()
+            if items:
+                self._ready.put(self)  # back of the line: fair between subscribers
+            else:
+                self._scheduled = False
+                self._cond.notify_all()  # wake flush()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+    def wait_idle(self, deadline=None):
+        with self._cond:
+            while self._scheduled:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return False
+                self._cond.wait(timeout)
+        return True
+
+    def stats(self):
+        return {"delivered": self.delivered, "dropped": self.dropped,
+                "coalesced": self.coalesced, "errors": self.errors,
+                "waiting": len(self._items)}
+
+
+# ============================================================================
+# Exchange
+# ============================================================================
+
+class Exchange:
+    """
+    Asynchronous topic exchange.
+
+    Args:
+        workers (int): Delivery threads shared by all subscribers
+        maxsize (int): Default mailbox capacity
+        policy (str): Default overflow policy (block/drop_oldest/coalesce)
+        max_batch (int): Messages a worker delivers before moving on to
+            the next subscriber
+        on_error: Called as on_error(task, msg, exc) when a subscriber raises
+    """
+
+    def __init__(self, workers=4, maxsize=1024, policy=BLOCK, max_batch=256, on_error=None):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_batch = max_batch
+        self._on_error = on_error or _print_error
+        self._ready = queue.SimpleQueue()
+        self._lock = threading.Lock()  # guards attach/detach only
+        self._mailboxes = {}           # task -> (mailbox, topics)
+        self._index = {None: ()}       # topic -> mailboxes; None = broadcast
+        self._wildcard = ()            # subscribers attached without topics
+        self._closed = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True,
+                                          name=f"exchange-{i}") for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def _worker(self):
+        ready, max_batch = self._ready, self.max_batch
+        while True:
+            mailbox = ready.get()
+            if mailbox is None:
+                return
+            mailbox.drain(max_batch)
+
+    def _rebuild_index(self):
+        # Copy-on-write: publishers read self._index without locking
+        wildcard, by_topic = [], {}
+        for mailbox, topics in self._mailboxes.values():
+            if topics is None:
+                wildcard.append(mailbox)
+            else:
+                for topic in topics:
+                    by_topic.setdefault(topic, []).append(mailbox)
+        index = {topic: tuple(boxes + wildcard) for topic, boxes in by_topic.items()}
+        index[None] = tuple(mailbox for mailbox, _ in self._mailboxes.values())
+        self._wildcard = tuple(wildcard)
+        self._index = index
+
+    def attach(self, task, topics=None, maxsize=None, policy=None, key=None, batch=False):
+        """
+        Subscribe ``task``.
+
+        Args:
+            task: Callable taking one message (or a list if ``batch``)
+            topics (iterable): Topics to receive; None = every message
+            maxsize (int): Mailbox capacity (default: exchange's)
+            policy (str): Overflow policy (default: exchange's)
+            key: For "coalesce", function of a message giving its
+                coalescing key (default: one key, so only the latest
+                message waits)
+            batch (bool): Deliver lists of messages instead of one at a time
+        """
+        mailbox = _Mailbox(task, self._ready, self._on_error, maxsize or self.maxsize,
+                           policy or self.policy, key, batch)
+        with self._lock:
+            if task in self._mailboxes:
+                raise ValueError(f"{task!r} is already attached")
+            self._mailboxes[task] = (mailbox, None if topics is None else frozenset(topics))
+            self._rebuild_index()
+
+    def detach(self, task):
+        """Unsubscribe ``task``; messages still waiting for it are discarded."""
+        with self._lock:
+            mailbox, _ = self._mailboxes.pop(task)
+            self._rebuild_index()
+        mailbox.close()
+
+    def publish(self, msgs, topic=None, timeout=None):
+        """
+        Enqueue a batch of messages for every subscriber of ``topic``.
+
+        topic=None broadcasts to all subscribers; a topic goes to its
+        subscribers plus those attached without topics. With the block
+        policy this waits for room, raising queue.Full after ``timeout``
+        (mailboxes already served keep the batch).
+        """
+        if self._closed:
+            raise RuntimeError("exchange is closed")
+        msgs = msgs if isinstance(msgs, (list, tuple)) else list(msgs)
+        if not msgs:
+            return
+        index = self._index
+        targets = index[None] if topic is None else index.get(topic, self._wildcard)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for mailbox in targets:
+            mailbox.put_many(msgs, deadline)
+
+    def send(self, msg, topic=None, timeout=None):
+        self.publish((msg,), topic, timeout)
+
+    def flush(self, timeout=None):
+        """Wait until every subscriber has been handed every published message."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return all(mailbox.wait_idle(deadline) for mailbox, _ in list(self._mailboxes.values()))
+
+    def stats(self):
+        return {task: mailbox.stats() for task, (mailbox, _) in list(self._mailboxes.items())}
+
+    def close(self, timeout=None):
+        """Deliver what is queued, then stop the worker threads."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        for _ in self._threads:
+            self._ready.put(None)
+        for t in self._threads:
+            t.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class _Recorder:
+    """Benchmark subscriber: records publish -> delivery latency."""
+
+    def __init__(self, sample=True):
+        self.latencies = [] if sample else None
+        self.count = 0
+
+    def __call__(self, msg):
+        self.count += 1
+        if self.latencies is not None:
+            self.latencies.append(time.perf_counter() - msg[1])
+
+
+def _run(make_exchange, n_subs, n_msgs, batch_size, sample_every):
+    recorders = [_Recorder(sample=(i % sample_every == 0)) for i in range(n_subs)]
+    exc = make_exchange()
+    for r in recorders:
+        exc.attach(r)
+    start = time.perf_counter()
+    for i in range(0, n_msgs, batch_size):
+        now = time.perf_counter()
+        batch = [(j, now) for j in range(i, min(i + batch_size, n_msgs))]
+        if isinstance(exc, SyncExchange):
+            for msg in batch:
+                exc.send(msg)
+        else:
+            exc.publish(batch)
+    if not isinstance(exc, SyncExchange):
+        exc.close()
+    elapsed = time.perf_counter() - start
+    assert all(r.count == n_msgs for r in recorders), "lost messages under the block policy"
+    lat = sorted(x for r in recorders if r.latencies for x in r.latencies)
+    return elapsed, lat
+
+
+def benchmark(workers, deliveries):
+    print("=" * 86)
+    print(f"EXCHANGE BENCHMARK ({workers} delivery threads, ~{deliveries:,} deliveries per row)")
+    print("=" * 86)
+    print(f"{'subs':>7} {'mode':<26} {'msgs/s':>11} {'deliveries/s':>13} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9}")
+    print("-" * 86)
+    for n_subs in (1, 100, 10_000):
+        n_msgs = max(deliveries // n_subs, 20)
+        sample_every = max(1, n_subs // 100)
+        modes = [
+            ("sync (notebook)", SyncExchange, 1),
+            ("async, send()", lambda: Exchange(workers=workers), 1),
+            ("async, publish(batch=64)", lambda: Exchange(workers=workers), 64),
+        ]
+        for label, make, batch_size in modes:
+            elapsed, lat = _run(make, n_subs, n_msgs, batch_size, sample_every)
+            print(f"{n_subs:>7,} {label:<26} {n_msgs / elapsed:>11,.0f} "
+                  f"{n_msgs * n_subs / elapsed:>13,.0f} {_percentile(lat, .5) * 1e3:>8.2f} "
+                  f"{_percentile(lat, .99) * 1e3:>8.2f} {_percentile(lat, .999) * 1e3:>9.2f}")
+
+    print("\nOne slow subscriber (1 ms per message) next to 100 fast ones, 2,000 messages")
+    print("-" * 86)
+    n_msgs = 2000
+
+    def slow(msg):
+        time.sleep(0.001)
+
+    for label, make in [
+        ("sync (notebook)", SyncExchange),
+        ("async, slow one drop_oldest", lambda: Exchange(workers=workers)),
+    ]:
+        fast = [_Recorder() for _ in range(100)]
+        exc = make()
+        for r in fast:
+            exc.attach(r)
+        if isinstance(exc, SyncExchange):
+            exc.attach(slow)
+        else:
+            exc.attach(slow, policy=DROP_OLDEST, maxsize=64)
+        start = time.perf_counter()
+        for i in range(n_msgs):
+            exc.send((i, time.perf_counter()))
+        publish_s = time.perf_counter() - start
+        if isinstance(exc, Exchange):
+            for r in fast:
+                exc._mailboxes[r][0].wait_idle()
+            fast_done = time.perf_counter() - start
+            dropped = exc.stats()[slow]["dropped"]
+            exc.close()
+        else:
+            fast_done, dropped = publish_s, 0
+        lat = sorted(x for r in fast for x in r.latencies)
+        print(f"{label:<30} publisher {n_msgs / publish_s:>10,.0f} msgs/s   fast subs done "
+              f"{fast_done:6.2f}s   fast p99 {_percentile(lat, .99) * 1e3:8.2f} ms   "
+              f"slow dropped {dropped:,}")
+
+
+def demo():
+    def police_rad(msg):
+        print(f"police recieving: {msg}")
+    def citizen_radio(msg):
+        print(f"Citizen recieving: {msg}")
+    def ticker(msgs):
+        print(f"ticker got batch: {msgs}")
+
+    with Exchange(workers=2) as exc:
+        exc.attach(police_rad, topics=["traffic", "crime"])
+        exc.attach(citizen_radio, topics=["traffic"])
+        exc.attach(ticker, topics=["prices"], policy=COALESCE, key=lambda m: m[0], batch=True)
+        exc.send("Traffic is jammed. everybody go homes", topic="traffic")
+        exc.send("Bank robbery downtown", topic="crime")
+        exc.publish([("ACME", 10), ("INIT", 5), ("ACME", 11), ("ACME", 12)], topic="prices")
+        exc.flush()
+        print(exc.stats()[ticker])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back-pressured pub/sub exchange")
+    parser.add_argument("mode", nargs="?", choices=["demo", "bench"], default="demo")
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--deliveries", type=int, default=200_000)
+    args = parser.parse_args()
+    if args.mode == "bench":
+        benchmark(args.workers, args.deliveries)
+    else:
+        demo()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+External k-way merge sort for large text files
+File: external_sort.py
+Purpose: Sort (or merge) files far bigger than RAM within a fixed memory budget
+
+heapq.merge(file1, file2, key=int) only works when the inputs are already
+sorted and small. This sorts any number of line-oriented files:
+
+1. Split: inputs are cut into newline-aligned byte ranges sized from the
+   memory budget; worker processes each read one range, sort it and write
+   it as a run file (at most ``workers`` ranges are in memory at once)
+2. Merge: runs are k-way merged with heapq.merge through large buffered
+   readers/writers; with more runs than ``fan_in`` the merge takes several
+   passes, so open files and buffers stay bounded too
+
+Lines are handled as bytes: UTF-8 byte order is code point order, so the
+lexical sort needs no decoding, and int()/float() accept bytes directly.
+The sort is stable, and ``unique`` drops lines whose key equals the
+previous line's. With the int/float keys blank lines are dropped; any
+other line the key can't parse stops the sort with its file and line.
+
+Usage:
+    python external_sort.py sorted_file_1 sorted_file_2 -o merged_file --key int
+    python external_sort.py big.txt -o big.sorted --memory-mb 256 --unique
+    python external_sort.py bench --sizes-gb 1 10
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+IO_BUFFER = 1 << 20
+# Python lists of bytes objects take roughly 3x the raw text
+MEMORY_OVERHEAD = 3
+
+KEYS = {
+    "lex": None,
+    "int": int,
+    "float": float,
+}
+
+
+def _key_func(key):
+    # Named keys are looked up by name so they pickle into worker processes
+    return KEYS[key] if isinstance(key, str) else key
+
+
+def _line_ranges(path, chunk_bytes):
+    """Newline-aligned (start, end) byte ranges of about chunk_bytes each."""
+    size = os.path.getsize(path)
+    ranges, start = [], 0
+    with open(path, "rb") as f:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                end += len(f.readline())
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _dedupe(lines, key):
+    last = object()
+    for line in lines:
+        k = key(line) if key else line
+        if k != last:
+            last = k
+            yield line
+
+
+def _bad_line(path, start, end, key, skip_blank):
+    # Error path only: re-read the range to find the first line key rejects
+    with open(path, "rb") as f:
+        lineno, remaining = 1, start
+        while remaining:
+            chunk = f.read(min(IO_BUFFER, remaining))
+            lineno += chunk.count(b"\n")
+            remaining -= len(chunk)
+        for i, line in enumerate(f.read(end - start).splitlines(keepends=True)):
+            if skip_blank and line.isspace():
+                continue
+            try:
+                key(line)
+            except ValueError as e:
+                return ValueError(f"{path}:{lineno + i}: {e}")
+    return None
+
+
+def _sort_run(path, start, end, run_path, key, unique):
+    """Worker: sort one byte range of ``path`` into ``run_path``."""
+    key = _key_func(key)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if data and not data.endswith(b"\n"):
+        data += b"\n"
+    lines = data.splitlines(keepends=True)
+    del data
+    try:
+        lines.sort(key=key)
+    except ValueError as e:
+        # Filtering costs a pass, so only pay it when a key actually failed
+        skip_blank = key in (int, float)
+        if skip_blank:
+            lines = [line for line in lines if not line.isspace()]
+        try:
+            lines.sort(key=key)
+        except ValueError:
+            raise _bad_line(path, start, end, key, skip_blank) or e from None
+    if unique:
+        lines = list(_dedupe(lines, key))
+    with open(run_path, "wb", buffering=IO_BUFFER) as out:
+        out.writelines(lines)
+    return run_path, len(lines)
+
+
+def _merge(run_paths, out_path, key, unique):
+    key = _key_func(key)
+    readers = [open(p, "rb", buffering=IO_BUFFER) for p in run_paths]
+    try:
+        merged = heapq.merge(*readers, key=key)
+        if unique:
+            merged = _dedupe(merged, key)
+        with open(out_path, "wb", buffering=IO_BUFFER) as out:
+            out.writelines(merged)
+    finally:
+        for r in readers:
+            r.close()
+
+
+def external_sort(inputs, output, key="lex", unique=False, memory_mb=256,
+                  workers=None, fan_in=64, tmpdir=None, stats=None):
+    """
+    Sort the lines of one or more files into ``output``.
+
+    Args:
+        inputs (list): Paths to sort together (sorted or not)
+        output (str): Destination path (may be one of the inputs)
+        key: "lex", "int", "float", or a picklable function of a bytes line
+        unique (bool): Drop lines whose key repeats
+        memory_mb (int): Budget for all in-memory runs together
+        workers (int): Processes that build runs (default: CPU count)
+        fan_in (int): Max runs merged at once (at least 2)
+        tmpdir (str): Where runs go (default: next to ``output``)
+        stats (dict): If given, filled with run counts and phase timings
+
+    Returns:
+        str: ``output``
+
+    Raises:
+        ValueError: ``fan_in`` < 2, or a line the key can't parse (the
+            message names the file and line)
+    """
+    if fan_in < 2:
+        raise ValueError(f"fan_in must be at least 2, got {fan_in}")
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    workers = workers or os.cpu_count() or 1
+    # Every worker holds one run in memory, so split the budget between them
+    run_bytes = max(1 << 20, memory_mb * 2**20 // workers // MEMORY_OVERHEAD)
+    tmpdir = tempfile.mkdtemp(prefix="extsort-", dir=tmpdir or os.path.dirname(os.path.abspath(output)))
+    try:
+        t0 = time.perf_counter()
+        tasks = []
+        for path in inputs:
+            for start, end in _line_ranges(path, run_bytes):
+                run_path = os.path.join(tmpdir, f"run{len(tasks):06d}")
+                tasks.append((path, start, end, run_path))
+
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # pool.map submits everything up front, but the data is only
+                # read inside the workers, so at most `workers` runs are in RAM
+                runs = list(pool.map(_sort_run, *zip(*tasks),
+                                     itertools.repeat(key), itertools.repeat(unique)))
+        else:
+            runs = [_sort_run(*task, key, unique) for task in tasks]
+        run_paths = [path for path, _ in runs]
+        t1 = time.perf_counter()
+
+        passes = 0
+        while len(run_paths) > fan_in:
+            passes += 1
+            merged = []
+            for i in range(0, len(run_paths), fan_in):
+                group = run_paths[i:i + fan_in]
+                out = os.path.join(tmpdir, f"pass{passes}-{i // fan_in:06d}")
+                _merge(group, out, key, unique)
+                for p in group:
+                    os.remove(p)
+                merged.append(out)
+            run_paths = merged
+
+        partial = output + ".partial"
+        if run_paths:
+            _merge(run_paths, partial, key, unique)
+        else:
+            open(partial, "wb").close()
+        os.replace(partial, output)
+        t2 = time.perf_counter()
+
+        if stats is not None:
+            stats.update(runs=len(tasks), run_bytes=run_bytes, merge_passes=passes + 1,
+                         split_s=t1 - t0, merge_s=t2 - t1)
+        return output
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _write_random(path, size_bytes):
+    import random
+    rng = random.Random(42)
+    block = 1 << 16
+    written = 0
+    with open(path, "wb", buffering=IO_BUFFER) as f:
+        while written < size_bytes:
+            data = b"".join(b"%d\n" % rng.getrandbits(48) for _ in range(block))
+            f.write(data)
+            written += len(data)
+
+
+def _check_sorted(path, key):
+    key = _key_func(key) or (lambda line: line)
+    with open(path, "rb", buffering=IO_BUFFER) as f:
+        prev, count = None, 0
+        for line in f:
+            k = key(line)
+            if prev is not None and k < prev:
+                return False, count
+            prev, count = k, count + 1
+    return True, count
+
+
+def benchmark(sizes_gb, memory_mb, workers, tmpdir):
+    print("=" * 78)
+    print(f"EXTERNAL SORT BENCHMARK (memory budget {memory_mb} MB, {workers} workers)")
+    print("=" * 78)
+    print(f"{'size':>8} {'key':>5} {'runs':>6} {'split s':>9} {'merge s':>9} "
+          f"{'total s':>9} {'MB/s':>8} {'peak RSS MB':>12}")
+    print("-" * 78)
+    for size_gb in sizes_gb:
+        with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+            src = os.path.join(tmp, "input.txt")
+            dst = os.path.join(tmp, "output.txt")
+            _write_random(src, int(size_gb * 2**30))
+            mb = os.path.getsize(src) / 2**20
+            for key in ("int", "lex"):
+                stats = {}
+                start = time.perf_counter()
+                external_sort([src], dst, key=key, memory_mb=memory_mb, workers=workers,
+                              tmpdir=tmp, stats=stats)
+                elapsed = time.perf_counter() - start
+                # ru_maxrss is KB on Linux, bytes on macOS; children = run workers
+                peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                           resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+                peak /= 2**20 if sys.platform == "darwin" else 2**10
+                ok, count = _check_sorted(dst, key)
+                assert ok, f"{key} output is not sorted"
+                print(f"{size_gb:>6g}GB {key:>5} {stats['runs']:>6} {stats['split_s']:>9.2f} "
+                      f"{stats['merge_s']:>9.2f} {elapsed:>9.2f} {mb / elapsed:>8.1f} {peak:>12.0f}")
+    print("✓ Every output verified sorted")
+
+
+def _fan_in(value):
+    n = int(value)
+    if n < 2:
+        raise argparse.ArgumentTypeError(f"must be at least 2, got {n}")
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="External k-way merge sort")
+    parser.add_argument("inputs", nargs="+", help="Files to sort, or 'bench'")
+    parser.add_argument("-o", "--output", help="Output file (required unless benchmarking)")
+    parser.add_argument("-k", "--key", choices=sorted(KEYS), default="lex")
+    parser.add_argument("-u", "--unique", action="store_true")
+    parser.add_argument("-m", "--memory-mb", type=int, default=256)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--fan-in", type=_fan_in, default=64)
+    parser.add_argument("--tmpdir")
+    parser.add_argument("--sizes-gb", type=float, nargs="+", default=[1, 10],
+                        help="bench: input sizes to generate")
+    args = parser.parse_args()
+
+    if args.inputs == ["bench"]:
+        benchmark(args.sizes_gb, args.memory_mb, args.workers, args.tmpdir)
+        return
+    if not args.output:
+        parser.error("--output is required")
+    stats = {}
+    start = time.perf_counter()
+    try:
+        external_sort(args.inputs, args.output, key=args.key, unique=args.unique,
+                      memory_mb=args.memory_mb, workers=args.workers, fan_in=args.fan_in,
+                      tmpdir=args.tmpdir, stats=stats)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"✓ Sorted {len(args.inputs)} file(s) -> {args.output} in {time.perf_counter() - start:.2f}s "
+          f"({stats['runs']} runs, {stats['merge_passes']} merge passes)")
+
+
+if __name__ == "__main__":
+    main()
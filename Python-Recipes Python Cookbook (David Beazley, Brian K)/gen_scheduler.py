@@ -0,0 +1,691 @@
+"""
+Generator-based cooperative scheduler with timers and socket I/O
+File: gen_scheduler.py
+Purpose: Run very many lightweight generator tasks on one thread
+
+The task_a/task_b demo in 12.concurrency.ipynb round-robins generators
+through a list with tasks.pop(0) - O(n) per step - and a task can only
+``yield`` to let the others run. This scheduler keeps the same idea
+(a task is a generator, ``yield`` gives up the CPU) and adds:
+
+- an O(1) ready deque
+- a heap of sleeping tasks:          yield sleep(seconds)
+- selectors-based I/O waiting:       yield read_wait(sock) / write_wait(sock)
+- spawn / join / cancel:             t = yield spawn(gen)
+                                     result = yield join(t)
+                                     yield cancel(t)
+- socket helpers for ``yield from``: accept, recv, recv_into, sendall, connect
+
+A cancelled task gets TaskCancelled thrown in at its current yield, so
+try/finally blocks run. Joining a task returns its return value, or
+raises the exception it died with (TaskCancelled if it was cancelled).
+A task that fails and is never joined is reported on stderr when run()
+returns, like asyncio's "Task exception was never retrieved".
+
+Usage:
+    def echo(conn):
+        while data := (yield from recv(conn, 65536)):
+            yield from sendall(conn, data)
+
+    sched = Scheduler()
+    sched.run(main())
+
+    python gen_scheduler.py bench
+"""
+
+import argparse
+import errno
+import functools
+import heapq
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+_SLEEP, _READ, _WRITE, _SPAWN, _JOIN, _CANCEL = range(6)
+
+
+class TaskCancelled(Exception):
+    """Thrown into a task that has been cancelled."""
+
+
+# ============================================================================
+# Traps: what a task yields to ask the scheduler for something
+# ============================================================================
+
+def sleep(seconds):
+    return (_SLEEP, seconds)
+
+
+def read_wait(sock):
+    return (_READ, sock)
+
+
+def write_wait(sock):
+    return (_WRITE, sock)
+
+
+def spawn(gen):
+    return (_SPAWN, gen)
+
+
+def join(task):
+    return (_JOIN, task)
+
+
+def cancel(task):
+    return (_CANCEL, task)
+
+
+# ============================================================================
+# Socket helpers (use with ``yield from``; sockets must be non-blocking)
+# ============================================================================
+
+def accept(sock):
+    while True:
+        try:
+            conn, addr = sock.accept()
+        except BlockingIOError:
+            yield read_wait(sock)
+        else:
+            conn.setblocking(False)
+            return conn, addr
+
+
+def recv(sock, maxsize):
+    while True:
+        try:
+            return sock.recv(maxsize)
+        except BlockingIOError:
+            yield read_wait(sock)
+
+
+def recv_into(sock, buf):
+    while True:
+        try:
+            return sock.recv_into(buf)
+        except BlockingIOError:
+            yield read_wait(sock)
+
+
+def sendall(sock, data):
+    view = memoryview(data)
+    while view:
+        try:
+            view = view[sock.send(view):]
+        except BlockingIOError:
+            yield write_wait(sock)
+
+
+def connect(sock, address):
+    err = sock.connect_ex(address)
+    if err == 0:
+        return
+    if err not in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+        raise OSError(err, os.strerror(err))
+    yield write_wait(sock)
+    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    if err:
+        raise OSError(err, f"connect to {address} failed")
+
+
+# ============================================================================
+# Scheduler
+# ============================================================================
+
+class Task:
+    __slots__ = ('gen', 'id', 'name', 'result', 'exception', 'done', 'cancelled',
+                 '_value', '_exc', '_wait', '_joiners')
+
+    def __init__(self, gen, task_id):
+        self.gen = gen
+        self.id = task_id
+        self.name = getattr(gen, '__name__', repr(gen))   # gen is dropped when done
+        self.result = self.exception = None
+        self.done = self.cancelled = False
+        self._value = None       # sent in at the next step
+        self._exc = None         # or thrown in at the next step
+        self._wait = None        # what it is blocked on; None = ready or running
+        self._joiners = []
+
+    def __repr__(self):
+        state = 'cancelled' if self.cancelled else 'done' if self.done else 'pending'
+        return f"<Task {self.id} {self.name} {state}>"
+
+
+class Scheduler:
+    """
+    Round-robin scheduler for generator tasks.
+
+    Each loop iteration polls for I/O (without blocking if tasks are
+    ready), wakes expired sleepers, then steps every task that was ready
+    at the start of the pass once.
+    """
+
+    def __init__(self):
+        self._ready = deque()
+        self._sleeping = []           # heap of [deadline, seq, task]; task=None if cancelled
+        self._seq = 0
+        self._selector = selectors.DefaultSelector()
+        self._readers = {}            # fd -> task
+        self._writers = {}
+        self._next_id = 0
+        self._unjoined_failures = {}  # failed tasks nobody has joined yet
+        self.switches = 0
+
+    def spawn(self, gen):
+        """Add a generator as a new task (usable before or during run)."""
+        self._next_id += 1
+        task = Task(gen, self._next_id)
+        self._ready.append(task)
+        return task
+
+    # -- I/O registration -----------------------------------------------------
+
+    def _mask(self, fd):
+        return ((selectors.EVENT_READ if fd in self._readers else 0)
+                | (selectors.EVENT_WRITE if fd in self._writers else 0))
+
+    def _wait_io(self, task, sock, event):
+        fd = sock if isinstance(sock, int) else sock.fileno()
+        waiters = self._readers if event == selectors.EVENT_READ else self._writers
+        if fd in waiters:
+            task._exc = RuntimeError(f"fd {fd} already has a waiting task")
+            self._ready.append(task)
+            return
+        old = self._mask(fd)
+        waiters[fd] = task
+        if old:
+            self._selector.modify(fd, old | event)
+        else:
+            self._selector.register(fd, event)
+        task._wait = (event, fd)
+
+    def _unwait_io(self, fd, event):
+        waiters = self._readers if event == selectors.EVENT_READ else self._writers
+        task = waiters.pop(fd)
+        mask = self._mask(fd)
+        if mask:
+            self._selector.modify(fd, mask)
+        else:
+            self._selector.unregister(fd)
+        return task
+
+    # -- task lifecycle -------------------------------------------------------
+
+    def _finish(self, task, result=None, exception=None, cancelled=False):
+        task.done = True
+        task.result, task.exception, task.cancelled = result, exception, cancelled
+        task.gen = None
+        if exception is not None and not cancelled and not task._joiners:
+            self._unjoined_failures[task] = None
+        for joiner in task._joiners:
+            joiner._wait = None
+            if cancelled:
+                joiner._exc = TaskCancelled(f"{task!r} was cancelled")
+            elif exception is not None:
+                joiner._exc = exception
+            else:
+                joiner._value = result
+            self._ready.append(joiner)
+        task._joiners = []
+
+    def _cancel(self, task):
+        if task.done:
+            return False
+        wait = task._wait
+        if wait is not None:
+            kind = wait[0]
+            if kind == _SLEEP:
+                wait[1][2] = None                  # lazy delete from the heap
+            elif kind == _JOIN:
+                wait[1]._joiners.remove(task)
+            else:
+                self._unwait_io(wait[1], kind)
+            task._wait = None
+            self._ready.append(task)
+        # Otherwise it is already in the ready deque
+        task._exc = TaskCancelled()
+        return True
+
+    def _step(self, task):
+        self.switches += 1
+        value, exc = task._value, task._exc
+        task._value = task._exc = None
+        try:
+            trap = task.gen.throw(exc) if exc is not None else task.gen.send(value)
+        except StopIteration as e:
+            self._finish(task, result=e.value)
+            return
+        except TaskCancelled as e:
+            self._finish(task, exception=e, cancelled=True)
+            return
+        except Exception as e:
+            self._finish(task, exception=e)
+            return
+
+        if trap is None:
+            self._ready.append(task)
+            return
+        code, arg = trap
+        if code == _SLEEP:
+            if arg <= 0:
+                self._ready.append(task)
+                return
+            self._seq += 1
+            entry = [time.monotonic() + arg, self._seq, task]
+            heapq.heappush(self._sleeping, entry)
+            task._wait = (_SLEEP, entry)
+        elif code == _READ:
+            self._wait_io(task, arg, selectors.EVENT_READ)
+        elif code == _WRITE:
+            self._wait_io(task, arg, selectors.EVENT_WRITE)
+        elif code == _SPAWN:
+            task._value = self.spawn(arg)
+            self._ready.append(task)
+        elif code == _JOIN:
+            if arg.done:
+                self._unjoined_failures.pop(arg, None)
+                if arg.cancelled:
+                    task._exc = TaskCancelled(f"{arg!r} was cancelled")
+                elif arg.exception is not None:
+                    task._exc = arg.exception
+                else:
+                    task._value = arg.result
+                self._ready.append(task)
+            else:
+                arg._joiners.append(task)
+                task._wait = (_JOIN, arg)
+        elif code == _CANCEL:
+            if arg is task:
+                task._exc = TaskCancelled()
+            else:
+                task._value = self._cancel(arg)
+            self._ready.append(task)
+        else:
+            task._exc = RuntimeError(f"unknown trap {trap!r}")
+            self._ready.append(task)
+
+    # -- main loop ------------------------------------------------------------
+
+    def run(self, main=None):
+        """
+        Run until no task is ready, sleeping or waiting on I/O.
+
+        Args:
+            main (generator): Optional task whose result is returned (or
+                whose exception is raised)
+        """
+        main_task = self.spawn(main) if main is not None else None
+        ready, sleeping = self._ready, self._sleeping
+        step, select = self._step, self._selector.select
+        while True:
+            while sleeping and sleeping[0][2] is None:
+                heapq.heappop(sleeping)
+            if not (ready or sleeping or self._readers or self._writers):
+                break
+            if ready:
+                timeout = 0
+            elif sleeping:
+                timeout = max(0.0, sleeping[0][0] - time.monotonic())
+            else:
+                timeout = None
+
+            if self._readers or self._writers:
+                for key, mask in select(timeout):
+                    fd = key.fd
+                    if mask & selectors.EVENT_READ and fd in self._readers:
+                        task = self._unwait_io(fd, selectors.EVENT_READ)
+                        task._wait = None
+                        ready.append(task)
+                    if mask & selectors.EVENT_WRITE and fd in self._writers:
+                        task = self._unwait_io(fd, selectors.EVENT_WRITE)
+                        task._wait = None
+                        ready.append(task)
+            elif timeout:
+                time.sleep(timeout)
+
+            if sleeping:
+                now = time.monotonic()
+                while sleeping and sleeping[0][0] <= now:
+                    task = heapq.heappop(sleeping)[2]
+                    if task is not None:
+                        task._wait = None
+                        ready.append(task)
+
+            for _ in range(len(ready)):
+                step(ready.popleft())
+
+        self._report_unjoined(main_task)
+        if main_task is not None:
+            if not main_task.done:
+                raise RuntimeError("main task is blocked forever (join cycle?)")
+            if main_task.cancelled:
+                raise TaskCancelled("main task was cancelled")
+            if main_task.exception is not None:
+                raise main_task.exception
+            return main_task.result
+
+    def _report_unjoined(self, main_task):
+        # Otherwise a failing background task would vanish without a trace;
+        # cancellation is not a failure, and main's exception is re-raised
+        failures, self._unjoined_failures = self._unjoined_failures, {}
+        for task in failures:
+            if task is not main_task:
+                print(f"Task exception was never retrieved: {task!r}", file=sys.stderr)
+                traceback.print_exception(task.exception, file=sys.stderr)
+
+
+def run(main):
+    """Run ``main`` (a generator) on a fresh Scheduler and return its result."""
+    return Scheduler().run(main)
+
+
+# ============================================================================
+# Demo and checks
+# ============================================================================
+
+def task_a():
+    for i in range(1,4):
+        print(f"task a is running at: {i}")
+        yield
+
+def task_b():
+    for i in range(21,25):
+        print(f"task b is running at: {i}")
+        yield
+
+
+def check():
+    sched = Scheduler()
+    sched.spawn(task_a())
+    sched.spawn(task_b())
+    sched.run()
+
+    log = []
+
+    def sleeper(name, delay):
+        try:
+            yield sleep(delay)
+            log.append(name)
+            return name.upper()
+        finally:
+            log.append(f"{name} cleanup")
+
+    def failing():
+        yield
+        raise ValueError("boom")
+
+    def main():
+        slow = yield spawn(sleeper("slow", 10))
+        fast = yield spawn(sleeper("fast", 0.01))
+        assert (yield join(fast)) == "FAST"
+        assert (yield cancel(slow)) is True
+        try:
+            yield join(slow)
+        except TaskCancelled:
+            log.append("slow cancelled")
+        try:
+            yield join((yield spawn(failing())))
+        except ValueError as e:
+            log.append(str(e))
+        return "ok"
+
+    start = time.monotonic()
+    assert run(main()) == "ok"
+    assert time.monotonic() - start < 1, "cancelled sleeper kept the loop alive"
+    assert log == ["fast", "fast cleanup", "slow cleanup", "slow cancelled", "boom"], log
+
+    # Echo over a socket pair, driven only by the scheduler
+    def echo_server(sock):
+        while data := (yield from recv(sock, 65536)):
+            yield from sendall(sock, data)
+        sock.close()
+
+    def client(sock, n):
+        got = bytearray()
+        payload = bytes(range(256)) * 4096   # 1 MB: forces partial sends
+        for _ in range(n):
+            # Send from a second task: sending 1 MB before reading would
+            # fill both socket buffers and deadlock
+            sender = yield spawn(sendall(sock, payload))
+            while len(got) < len(payload):
+                got += yield from recv(sock, 65536)
+            yield join(sender)
+            assert got == payload
+            got.clear()
+        sock.close()
+        return n
+
+    def io_main():
+        a, b = socket.socketpair()
+        a.setblocking(False)
+        b.setblocking(False)
+        server = yield spawn(echo_server(a))
+        result = yield join((yield spawn(client(b, 5))))
+        yield join(server)
+        return result
+
+    assert run(io_main()) == 5
+    print("✓ sleep, join, cancel (with finally), exception propagation and socket echo work")
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _notebook_loop(n_tasks, n_yields):
+    def task():
+        for _ in range(n_yields):
+            yield
+    tasks = [task() for _ in range(n_tasks)]
+    while tasks:
+        task = tasks.pop(0)
+        try:
+            next(task)
+            tasks.append(task)
+        except StopIteration:
+            pass
+
+
+def _sched_yields(n_tasks, n_yields):
+    def task():
+        for _ in range(n_yields):
+            yield
+    sched = Scheduler()
+    for _ in range(n_tasks):
+        sched.spawn(task())
+    sched.run()
+
+
+@functools.lru_cache(maxsize=None)
+def _stdlib_asyncio():
+    # ssl.py in this folder shadows the stdlib module asyncio imports
+    here = os.path.dirname(os.path.abspath(__file__))
+    saved = sys.path[:]
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or '.') != here]
+    try:
+        import asyncio
+    finally:
+        sys.path[:] = saved
+    return asyncio
+
+
+def _asyncio_yields(n_tasks, n_yields):
+    asyncio = _stdlib_asyncio()
+
+    async def task():
+        for _ in range(n_yields):
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(task() for _ in range(n_tasks)))
+    asyncio.run(main())
+
+
+def _thread_ring(n_threads, n_rounds):
+    # Token ring: each handoff wakes the next thread, one switch per handoff
+    events = [threading.Event() for _ in range(n_threads)]
+
+    def worker(i):
+        me, nxt = events[i], events[(i + 1) % n_threads]
+        for _ in range(n_rounds):
+            me.wait()
+            me.clear()
+            nxt.set()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    events[0].set()
+    for t in threads:
+        t.join()
+
+
+def _sched_pingpong(pairs, rounds):
+    def side(sock, first):
+        buf = bytearray(64)
+        for _ in range(rounds):
+            if first:
+                yield from sendall(sock, b"ping")
+                yield from recv_into(sock, buf)
+            else:
+                yield from recv_into(sock, buf)
+                yield from sendall(sock, b"pong")
+        sock.close()
+
+    sched = Scheduler()
+    for _ in range(pairs):
+        a, b = socket.socketpair()
+        a.setblocking(False)
+        b.setblocking(False)
+        sched.spawn(side(a, True))
+        sched.spawn(side(b, False))
+    sched.run()
+
+
+def _asyncio_pingpong(pairs, rounds):
+    asyncio = _stdlib_asyncio()
+
+    async def side(loop, sock, first):
+        for _ in range(rounds):
+            if first:
+                await loop.sock_sendall(sock, b"ping")
+                await loop.sock_recv(sock, 64)
+            else:
+                await loop.sock_recv(sock, 64)
+                await loop.sock_sendall(sock, b"pong")
+        sock.close()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        coros = []
+        for _ in range(pairs):
+            a, b = socket.socketpair()
+            a.setblocking(False)
+            b.setblocking(False)
+            coros += [side(loop, a, True), side(loop, b, False)]
+        await asyncio.gather(*coros)
+    asyncio.run(main())
+
+
+def _thread_pingpong(pairs, rounds):
+    def side(sock, first):
+        for _ in range(rounds):
+            if first:
+                sock.sendall(b"ping")
+                sock.recv(64)
+            else:
+                sock.recv(64)
+                sock.sendall(b"pong")
+        sock.close()
+
+    threads = []
+    for _ in range(pairs):
+        a, b = socket.socketpair()
+        threads += [threading.Thread(target=side, args=(a, True)),
+                    threading.Thread(target=side, args=(b, False))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def _sched_sleepers(n_tasks, max_delay):
+    def sleeper(delay):
+        yield sleep(delay)
+    sched = Scheduler()
+    for i in range(n_tasks):
+        sched.spawn(sleeper(max_delay * (i % 1000) / 1000))
+    sched.run()
+
+
+def _asyncio_sleepers(n_tasks, max_delay):
+    asyncio = _stdlib_asyncio()
+
+    async def main():
+        await asyncio.gather(*(asyncio.sleep(max_delay * (i % 1000) / 1000) for i in range(n_tasks)))
+    asyncio.run(main())
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def benchmark(max_tasks):
+    _stdlib_asyncio()  # keep the import out of the first timing
+    print("=" * 76)
+    print("CONTEXT SWITCHES (N tasks x 20 yields, round robin)")
+    print("=" * 76)
+    print(f"{'tasks':>9} {'runner':<28} {'switches/s':>14} {'seconds':>9}")
+    print("-" * 76)
+    n_yields = 20
+    for n in [10, 1_000, 10_000, max_tasks]:
+        runners = [("generator Scheduler", _sched_yields), ("asyncio sleep(0)", _asyncio_yields)]
+        if n <= 10_000:
+            runners.insert(0, ("list.pop(0) (notebook)", _notebook_loop))
+        if n <= 1_000:
+            runners.append(("threads, Event token ring", _thread_ring))
+        for label, func in runners:
+            elapsed = _timed(func, n, n_yields)
+            print(f"{n:>9,} {label:<28} {n * n_yields / elapsed:>14,.0f} {elapsed:>9.3f}")
+
+    print("\n" + "=" * 76)
+    print(f"TIMERS ({max_tasks:,} tasks sleeping 0-50 ms)")
+    print("=" * 76)
+    for label, func in [("generator Scheduler", _sched_sleepers), ("asyncio", _asyncio_sleepers)]:
+        print(f"{label:<28} {_timed(func, max_tasks, 0.05):>9.3f} s")
+
+    print("\n" + "=" * 76)
+    print("SOCKET PING-PONG (socketpairs x 200 round trips)")
+    print("=" * 76)
+    print(f"{'pairs':>9} {'runner':<28} {'round trips/s':>14} {'seconds':>9}")
+    print("-" * 76)
+    rounds = 200
+    for pairs in [1, 100, 500]:
+        runners = [("generator Scheduler", _sched_pingpong), ("asyncio sock_recv", _asyncio_pingpong)]
+        if pairs <= 100:
+            runners.append(("threads, blocking sockets", _thread_pingpong))
+        for label, func in runners:
+            elapsed = _timed(func, pairs, rounds)
+            print(f"{pairs:>9,} {label:<28} {pairs * rounds / elapsed:>14,.0f} {elapsed:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator task scheduler")
+    parser.add_argument("mode", nargs="?", choices=["check", "bench"], default="check")
+    parser.add_argument("--max-tasks", type=int, default=100_000)
+    args = parser.parse_args()
+    check()
+    if args.mode == "bench":
+        benchmark(args.max_tasks)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,363 @@
-import socket, os, hmac, multiprocessing
+import socket, os, hmac, multiprocessing, selectors, time, threading, argparse, statistics, signal
 from multiprocessing.reduction import send_handle, recv_handle
 
 SECRKEY = b'haseeb234'
+NONCE_SIZE = 32
+DIGEST_SIZE = 32
+GRANTED = b"Access granted to vault!..."
 
 def authenticate(conn):
-    nonce = os.urandom(32)
+    nonce = os.urandom(NONCE_SIZE)
     conn.sendall(nonce)
     digest = hmac.new(SECRKEY, nonce, 'sha256').digest()
     client_digest = conn.recv(len(digest))
     return hmac.compare_digest(digest, client_digest)
 
-def worker(pipe):
-    while True:
-        fd = recv_handle(pipe)
-        with socket.fromfd(fd, socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.sendall(b"Access granted to vault!...")
-
-def gatekeeper(address, pipe, worker_pid):
-    raw_s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    raw_s.bind(address)
-    raw_s.listen(5)
-    print(f"Gatekeeper listening on {address}")
+def answer_challenge(conn):
+    # Client side of authenticate(): read the nonce, send back its HMAC
+    nonce = b''
+    while len(nonce) < NONCE_SIZE:
+        chunk = conn.recv(NONCE_SIZE - len(nonce))
+        if not chunk:
+            raise ConnectionError("gatekeeper closed during handshake")
+        nonce += chunk
+    conn.sendall(hmac.new(SECRKEY, nonce, 'sha256').digest())
+
+def worker(pipe, done=None, inherited=()):
+    # A forked worker inherits the gatekeeper's listener and every other
+    # worker's pipes; holding them open would keep the port bound and hide
+    # EOF on our own pipe after the gatekeeper exits
+    for fd in inherited:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
     while True:
-        client, adr = raw_s.accept()
-        print(f"Connection from {adr}")
-        if authenticate(client):
-            print("Authentication successful")
-            send_handle(pipe, client.fileno(), worker_pid)
+        try:
+            fd = recv_handle(pipe)
+        except EOFError:
+            # Gatekeeper went away
+            return
+        # socket(fileno=fd) takes ownership of the received fd, so it's
+        # closed with the socket (socket.fromfd would dup and leak it)
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM, fileno=fd) as s:
+            try:
+                s.sendall(GRANTED)
+            except OSError:
+                pass
+        if done is not None:
+            try:
+                done.send_bytes(b'1')
+            except OSError:
+                return  # gatekeeper closed
+
+
+class _Handshake:
+    """Non-blocking state of one client's HMAC handshake."""
+
+    __slots__ = ('sock', 'addr', 'outbuf', 'digest', 'inbuf', 'deadline')
+
+    def __init__(self, sock, addr, timeout):
+        nonce = os.urandom(NONCE_SIZE)
+        self.sock = sock
+        self.addr = addr
+        self.outbuf = memoryview(nonce)
+        self.digest = hmac.new(SECRKEY, nonce, 'sha256').digest()
+        self.inbuf = bytearray()
+        self.deadline = time.monotonic() + timeout
+
+
+class _Worker:
+    __slots__ = ('process', 'pipe', 'done', 'in_flight')
+
+
+class Gatekeeper:
+    """
+    Authenticates clients on a selector loop and hands each authenticated
+    fd to the least-loaded of N pre-forked worker processes.
+
+    A slow client only holds its own handshake state, never the loop; a
+    handshake that doesn't finish within ``handshake_timeout`` seconds is
+    dropped. A worker that dies is restarted in the same slot.
+
+    Example:
+        Gatekeeper(('localhost', 30000), workers=4).serve_forever()
+    """
+
+    def __init__(self, address=None, workers=None, handshake_timeout=5.0, verbose=True, sock=None):
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(address)
+        sock.listen(socket.SOMAXCONN)
+        sock.setblocking(False)
+        self.sock = sock
+        self.address = sock.getsockname()
+        self.handshake_timeout = handshake_timeout
+        self.verbose = verbose
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(sock, selectors.EVENT_READ, ('accept', None))
+        self.pending = {}
+        self.workers = [None] * (workers or os.cpu_count() or 1)
+        self.stats = {'accepted': 0, 'granted': 0, 'rejected': 0, 'timed_out': 0, 'restarts': 0}
+        for slot in range(len(self.workers)):
+            self._spawn(slot)
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    # -- workers ---------------------------------------------------------
+
+    def _spawn(self, slot):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        done_recv, done_send = multiprocessing.Pipe(duplex=False)
+        inherited = ()
+        if multiprocessing.get_start_method() == 'fork':
+            inherited = [self.sock.fileno(), parent_conn.fileno(), done_recv.fileno()]
+            if hasattr(self.selector, 'fileno'):
+                inherited.append(self.selector.fileno())  # epoll/kqueue fd
+            inherited += [hs.sock.fileno() for hs in self.pending.values()]
+            for w in self.workers:
+                if w is not None and not w.pipe.closed:
+                    inherited += [w.pipe.fileno(), w.done.fileno()]
+        p = multiprocessing.Process(target=worker, args=(child_conn, done_send, inherited), daemon=True)
+        p.start()
+        child_conn.close()
+        done_send.close()
+        w = _Worker()
+        w.process, w.pipe, w.done, w.in_flight = p, parent_conn, done_recv, 0
+        self.workers[slot] = w
+        # The sentinel becomes readable when the process exits
+        self.selector.register(p.sentinel, selectors.EVENT_READ, ('exit', slot))
+        self.selector.register(done_recv, selectors.EVENT_READ, ('done', slot))
+
+    def _restart(self, slot):
+        w = self.workers[slot]
+        self.selector.unregister(w.process.sentinel)
+        if w.done.fileno() in self.selector.get_map():
+            self.selector.unregister(w.done)
+        w.process.join()
+        w.pipe.close()
+        w.done.close()
+        self.log(f"Worker {w.process.pid} exited ({w.process.exitcode}), "
+                 f"{w.in_flight} connections lost; restarting")
+        self.stats['restarts'] += 1
+        self._spawn(slot)
+
+    def _on_done(self, slot):
+        w = self.workers[slot]
+        try:
+            while w.done.poll():
+                w.done.recv_bytes()
+                w.in_flight -= 1
+        except (EOFError, OSError):
+            # Worker is gone; its sentinel event restarts it
+            self.selector.unregister(w.done)
+
+    def _dispatch(self, client):
+        slot = min(range(len(self.workers)), key=lambda i: self.workers[i].in_flight)
+        w = self.workers[slot]
+        try:
+            send_handle(w.pipe, client.fileno(), w.process.pid)
+            w.in_flight += 1
+            self.stats['granted'] += 1
+        except OSError as e:
+            self.log(f"Could not hand connection to worker {w.process.pid}: {e}")
         client.close()
 
+    # -- handshakes ------------------------------------------------------
+
+    def _accept(self):
+        # Drain the backlog; each accepted socket starts its own handshake
+        while True:
+            try:
+                client, addr = self.sock.accept()
+            except BlockingIOError:
+                return
+            self.stats['accepted'] += 1
+            self.log(f"Connection from {addr}")
+            client.setblocking(False)
+            hs = _Handshake(client, addr, self.handshake_timeout)
+            self.pending[client] = hs
+            self.selector.register(client, selectors.EVENT_WRITE, ('client', hs))
+
+    def _drop(self, hs):
+        self.selector.unregister(hs.sock)
+        del self.pending[hs.sock]
+        hs.sock.close()
+
+    def _on_client(self, hs, events):
+        try:
+            if events & selectors.EVENT_WRITE:
+                sent = hs.sock.send(hs.outbuf)
+                hs.outbuf = hs.outbuf[sent:]
+                if not hs.outbuf:
+                    self.selector.modify(hs.sock, selectors.EVENT_READ, ('client', hs))
+                return
+            chunk = hs.sock.recv(DIGEST_SIZE - len(hs.inbuf))
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(hs)
+            return
+        if not chunk:
+            self._drop(hs)
+            return
+        hs.inbuf += chunk
+        if len(hs.inbuf) < DIGEST_SIZE:
+            return
+
+        self.selector.unregister(hs.sock)
+        del self.pending[hs.sock]
+        if hmac.compare_digest(hs.digest, bytes(hs.inbuf)):
+            self.log("Authentication successful")
+            self._dispatch(hs.sock)
+        else:
+            self.stats['rejected'] += 1
+            hs.sock.close()
+
+    def _expire(self):
+        now = time.monotonic()
+        for hs in [hs for hs in self.pending.values() if hs.deadline < now]:
+            self.log(f"Handshake from {hs.addr} timed out")
+            self.stats['timed_out'] += 1
+            self._drop(hs)
+
+    # -- loop ------------------------------------------------------------
+
+    def serve_forever(self, stop=None):
+        self.log(f"Gatekeeper listening on {self.address} with {len(self.workers)} workers")
+        tick = min(1.0, self.handshake_timeout / 2)
+        try:
+            while stop is None or not stop.is_set():
+                for key, events in self.selector.select(timeout=tick):
+                    kind, data = key.data
+                    if kind == 'client':
+                        self._on_client(data, events)
+                    elif kind == 'accept':
+                        self._accept()
+                    elif kind == 'done':
+                        self._on_done(data)
+                    elif kind == 'exit':
+                        self._restart(data)
+                if self.pending:
+                    self._expire()
+        finally:
+            self.close()
+
+    def close(self):
+        for hs in list(self.pending.values()):
+            self._drop(hs)
+        for w in self.workers:
+            w.pipe.close()  # workers see EOF and exit
+        for w in self.workers:
+            w.process.join(timeout=1)
+            if w.process.is_alive():
+                w.process.terminate()
+                w.process.join()
+            w.done.close()
+        self.selector.close()
+        self.sock.close()
+
+
+def _stop_on_sigterm():
+    # SIGTERM ends serve_forever normally, so close() reaps the workers
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    return stop
+
+
+def gatekeeper(address, workers=None):
+    Gatekeeper(address, workers=workers).serve_forever(_stop_on_sigterm())
+
+
+# ============================================================================
+# Load generator
+# ============================================================================
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def _client_loop(address, count, latencies, errors):
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            with socket.create_connection(address) as conn:
+                answer_challenge(conn)
+                reply = b''
+                while True:
+                    chunk = conn.recv(64)
+                    if not chunk:
+                        break
+                    reply += chunk
+            if reply != GRANTED:
+                raise ConnectionError(f"unexpected reply {reply!r}")
+        except OSError as e:
+            errors.append(e)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+def _serve_in_child(sock, workers):
+    Gatekeeper(sock=sock, workers=workers, verbose=False).serve_forever(_stop_on_sigterm())
+
+def benchmark(workers, clients, connections, slow_clients):
+    """
+    Run a gatekeeper on an ephemeral port and hammer it from client threads.
+
+    ``slow_clients`` connections are opened first and never answer the
+    challenge, to show they don't hold up anyone else.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('localhost', 0))
+    address = listener.getsockname()
+    # Not a daemon: daemonic processes may not start the worker processes
+    server = multiprocessing.Process(target=_serve_in_child, args=(listener, workers))
+    server.start()
+    listener.close()
+
+    stalled = [socket.create_connection(address) for _ in range(slow_clients)]
+    latencies, errors = [], []
+    per_client = connections // clients
+    threads = [threading.Thread(target=_client_loop, args=(address, per_client, latencies, errors))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    for s in stalled:
+        s.close()
+    server.terminate()
+    server.join()
+
+    print("=" * 60)
+    print(f"Gatekeeper benchmark: {workers} workers, {clients} clients, {slow_clients} stalled")
+    print("=" * 60)
+    print(f"Connections:   {len(latencies):,} ok, {len(errors)} failed in {elapsed:.2f}s")
+    print(f"Throughput:    {len(latencies) / elapsed:,.0f} connections/sec")
+    if latencies:
+        ms = [l * 1000 for l in latencies]
+        print(f"Handshake ms:  p50 {statistics.median(ms):.2f}  p95 {_percentile(ms, 95):.2f}  "
+              f"p99 {_percentile(ms, 99):.2f}  max {max(ms):.2f}")
+    if errors:
+        print(f"First error:   {errors[0]!r}")
+
+
 if __name__ == "__main__":
-    parent_conn, child_conn = multiprocessing.Pipe()
-    p = multiprocessing.Process(target=worker, args=(child_conn,), daemon=True)
-    p.start()
-    gatekeeper(('localhost', 30000), parent_conn, p.pid)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="HMAC gatekeeper with pre-forked workers")
+    parser.add_argument('mode', nargs='?', choices=['serve', 'bench'], default='serve')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--port', type=int, default=30000)
+    parser.add_argument('-c', '--clients', type=int, default=8, help="bench: client threads")
+    parser.add_argument('-n', '--connections', type=int, default=2000, help="bench: total connections")
+    parser.add_argument('--slow', type=int, default=4, help="bench: clients that never answer")
+    args = parser.parse_args()
+
+    if args.mode == 'bench':
+        benchmark(args.workers, args.clients, args.connections, args.slow)
+    else:
+        gatekeeper(('localhost', args.port), args.workers)
@@ -3,4 +3,11 @@ from xmlrpc.client import ServerProxy
 s = ServerProxy('http://localhost:15000')
 
 print(s.add(22,2))
-# print(s.div(32,3)) //force divs by 0 in server
\ No newline at end of file
+# print(s.div(32,3)) //force divs by 0 in server
+
+# Bulk calls: batched over one keep-alive connection against the server
+# from math_rpc.py; a plain SimpleXMLRPCServer gets one call per item
+from math_rpc import BatchClient
+
+client = BatchClient('http://localhost:15000')
+print(client.map('add', [(i, i) for i in range(10)]))
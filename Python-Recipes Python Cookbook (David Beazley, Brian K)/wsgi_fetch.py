@@ -0,0 +1,541 @@
+"""
+Cached, pooled upstream fetch for the hello_and_fetch WSGI app
+File: wsgi_fetch.py
+Purpose: Stop paying the upstream's latency on every request
+
+The hello_and_fetch app in 11.Networking and web programming.ipynb runs on
+wsgiref's single-threaded simple_server and calls urllib.request.urlopen
+for every request: a new TCP connection each time, no caching, one
+request at a time. This version adds:
+
+- ConnectionPool: keep-alive http.client connections per host, reused
+  LIFO; a request on a reused connection that turns out to be dead is
+  retried on another one
+- ResponseCache: TTL + stale-while-revalidate. Within ``ttl`` the cached
+  body is served; within ``stale`` more seconds it is still served while
+  one background thread refreshes it; concurrent misses for the same
+  URL share a single fetch (the rest wait for its result)
+- ThreadingWSGIServer: wsgiref's server with a thread per request
+- StubUpstream: a local HTTP/1.1 upstream with a fixed delay and a hit
+  counter, for checks and benchmarks without touching the internet
+
+Usage:
+    python wsgi_fetch.py serve --upstream http://httpbin.org/get --ttl 5 --stale 60
+    python wsgi_fetch.py stub --port 8081 --delay 0.05
+    python wsgi_fetch.py check
+    python wsgi_fetch.py bench
+"""
+
+import argparse
+import functools
+import http.client
+import importlib.machinery
+import importlib.util
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+from urllib import request
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+
+class UpstreamError(Exception):
+    """The upstream answered with a server error (not cached)."""
+
+
+@functools.lru_cache(maxsize=None)
+def _stdlib_ssl():
+    # ssl.py in this folder shadows the stdlib module http.client uses for
+    # https, and may already be in sys.modules, so load the real one by path
+    mod = sys.modules.get('ssl')
+    if mod is not None and hasattr(mod, 'create_default_context'):
+        return mod
+    here = os.path.dirname(os.path.abspath(__file__))
+    path = [p for p in sys.path if os.path.abspath(p or '.') != here]
+    spec = importlib.machinery.PathFinder.find_spec('ssl', path)
+    mod = importlib.util.module_from_spec(spec)
+    shadow = sys.modules.get('ssl')
+    sys.modules['ssl'] = mod  # enum _convert_ looks the module up by name
+    try:
+        spec.loader.exec_module(mod)
+    finally:
+        if shadow is not None:
+            sys.modules['ssl'] = shadow
+        else:
+            del sys.modules['ssl']
+    return mod
+
+
+class _HTTPSConnection(http.client.HTTPConnection):
+    # http.client.HTTPSConnection reads the shadowed ssl module's globals,
+    # so wrap the socket here with a context from the real one
+    default_port = 443
+
+    def __init__(self, host, port, timeout, context):
+        super().__init__(host, port, timeout=timeout)
+        self._context = context
+
+    def connect(self):
+        super().connect()
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+
+
+# ============================================================================
+# Keep-alive connection pool
+# ============================================================================
+
+class ConnectionPool:
+    """
+    Reusable http.client connections, keyed by (scheme, host, port).
+
+    Args:
+        maxsize (int): Idle connections kept per host
+        timeout (float): Socket timeout for new connections
+        ssl_context: Context for https hosts (default: the stdlib default context)
+    """
+
+    def __init__(self, maxsize=16, timeout=10.0, ssl_context=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.created = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            stack = self._idle.get(key)
+            if stack:
+                return stack.pop(), True
+            self.created += 1
+        scheme, host, port = key
+        if scheme == 'https':
+            context = self.ssl_context or _stdlib_ssl().create_default_context()
+            conn = _HTTPSConnection(host, port, self.timeout, context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return conn, False
+
+    def _put(self, key, conn):
+        with self._lock:
+            stack = self._idle.setdefault(key, [])
+            if len(stack) < self.maxsize:
+                stack.append(conn)
+                return
+        conn.close()
+
+    def request(self, url, method='GET', headers=None):
+        """
+        Send one request over a pooled connection.
+
+        Returns:
+            tuple: (status, headers, body bytes)
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"unsupported upstream scheme: {url!r}")
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        while True:
+            conn, reused = self._get(key)
+            try:
+                conn.request(method, path, headers=headers or {})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (ConnectionError, http.client.BadStatusLine):
+                conn.close()
+                if reused:
+                    continue  # the server closed an idle connection; try the next one
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._put(key, conn)
+            return resp.status, resp.getheaders(), body
+
+    def close(self):
+        with self._lock:
+            stacks, self._idle = self._idle, {}
+        for stack in stacks.values():
+            for conn in stack:
+                conn.close()
+
+
+# ============================================================================
+# TTL / stale-while-revalidate cache with miss collapsing
+# ============================================================================
+
+class _Entry:
+    __slots__ = ('value', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, ttl, stale):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale
+
+
+class ResponseCache:
+    """
+    Cache the results of ``fetch(key)``.
+
+    Args:
+        fetch: Function key -> value; exceptions are not cached
+        ttl (float): Seconds a value is fresh
+        stale (float): Further seconds a value is served while refreshing
+        max_entries (int): LRU bound
+        refresh_workers (int): Threads for background refreshes
+    """
+
+    def __init__(self, fetch, ttl=1.0, stale=30.0, max_entries=1024, refresh_workers=2):
+        self._fetch = fetch
+        self.ttl, self.stale, self.max_entries = ttl, stale, max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}            # key -> Future of the fetch in progress
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers,
+                                             thread_name_prefix='cache-refresh')
+        self.stats = dict(hits=0, stale_hits=0, misses=0, collapsed=0, fetches=0, errors=0)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now < entry.fresh_until:
+                    self.stats['hits'] += 1
+                    return entry.value
+                if now < entry.stale_until:
+                    self.stats['stale_hits'] += 1
+                    if key not in self._inflight:
+                        fut = self._inflight[key] = Future()
+                        self._refresher.submit(self._load, key, fut)
+                    return entry.value
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['collapsed'] += 1
+        if leader:
+            self._load(key, fut)
+        return fut.result()  # re-raises the leader's exception
+
+    def _load(self, key, fut):
+        try:
+            value = self._fetch(key)
+        except BaseException as e:
+            with self._lock:
+                self.stats['errors'] += 1
+                del self._inflight[key]
+            # A failed background refresh leaves the stale entry in place
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self.stats['fetches'] += 1
+            self._entries[key] = _Entry(value, self.ttl, self.stale)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        fut.set_result(value)
+
+    def close(self):
+        self._refresher.shutdown(wait=True)
+
+
+# ============================================================================
+# The app
+# ============================================================================
+
+def make_urlopen_app(upstream='http://httpbin.org/get'):
+    """The notebook app: one blocking urlopen per incoming request."""
+    def hello_and_fetch(environ, start_response):
+        with request.urlopen(upstream) as resp:
+            ext_data = resp.read().decode('utf-8')
+
+        start_response('200 OK', [('Content-type', 'text/html')])
+
+        content = f"<h1>Hello!</h1><p>External Status: {ext_data[:50]}...</p>"
+
+        return [content.encode('utf-8')]
+    return hello_and_fetch
+
+
+def make_app(upstream='http://httpbin.org/get', ttl=1.0, stale=30.0, pool=None):
+    """
+    hello_and_fetch backed by a ConnectionPool and (if ttl > 0) a ResponseCache.
+
+    The returned app exposes ``.pool`` and ``.cache``.
+    """
+    pool = pool or ConnectionPool()
+
+    def fetch(url):
+        status, _, body = pool.request(url)
+        if status >= 500:
+            raise UpstreamError(f"{url} returned {status}")
+        return body.decode('utf-8', 'replace')
+
+    cache = ResponseCache(fetch, ttl, stale) if ttl > 0 else None
+
+    def hello_and_fetch(environ, start_response):
+        try:
+            ext_data = cache.get(upstream) if cache else fetch(upstream)
+        except Exception as e:
+            # Whatever went wrong talking to the upstream, it is not our 500
+            start_response('502 Bad Gateway', [('Content-type', 'text/plain')])
+            return [f"Upstream unavailable: {e}".encode('utf-8')]
+
+        content = f"<h1>Hello!</h1><p>External Status: {ext_data[:50]}...</p>".encode('utf-8')
+        start_response('200 OK', [('Content-type', 'text/html'),
+                                  ('Content-Length', str(len(content)))])
+        return [content]
+
+    hello_and_fetch.pool = pool
+    hello_and_fetch.cache = cache
+    return hello_and_fetch
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_threaded_server(host, port, app, quiet=False):
+    return make_server(host, port, app, server_class=ThreadingWSGIServer,
+                       handler_class=QuietHandler if quiet else WSGIRequestHandler)
+
+
+# ============================================================================
+# Local stub upstream
+# ============================================================================
+
+class StubUpstream(BaseHTTPRequestHandler):
+    """Keep-alive JSON upstream that sleeps ``delay`` per request; /stats reports hits."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms) on a keep-alive connection
+    disable_nagle_algorithm = True
+    delay = 0.02
+    hits = 0
+    status = 200
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        if self.path == '/stats':
+            body = json.dumps({'hits': cls.hits}).encode()
+        else:
+            with cls._lock:
+                cls.hits += 1
+                n = cls.hits
+            time.sleep(cls.delay)
+            body = json.dumps({'url': self.path, 'hit': n, 'origin': '127.0.0.1'}).encode()
+        self.send_response(cls.status if self.path != '/stats' else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(delay=0.02, port=0):
+    """Run a StubUpstream in a daemon thread; returns (server, base_url)."""
+    handler = type('Stub', (StubUpstream,), {'delay': delay, 'hits': 0, '_lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def _get(url):
+    with request.urlopen(url) as resp:
+        return resp.status, resp.read()
+
+
+# ============================================================================
+# Checks
+# ============================================================================
+
+def check():
+    stub, base = start_stub(delay=0.1)
+    handler = stub.RequestHandlerClass
+    url = base + '/get'
+
+    pool = ConnectionPool()
+    for _ in range(5):
+        assert pool.request(url)[0] == 200
+    assert pool.created == 1, pool.created
+    print("✓ Pool: 5 sequential requests over 1 keep-alive connection")
+
+    cache = ResponseCache(lambda u: pool.request(u)[2], ttl=0.3, stale=5)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(url))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert handler.hits == 6 and len(set(results)) == 1, handler.hits
+    print(f"✓ Collapsing: 20 concurrent cold misses -> 1 upstream fetch {cache.stats}")
+
+    time.sleep(0.35)
+    start = time.perf_counter()
+    stale = cache.get(url)
+    elapsed = time.perf_counter() - start
+    assert stale == results[0] and elapsed < handler.delay / 2, elapsed
+    cache.close()  # waits for the background refresh
+    assert handler.hits == 7
+    assert cache.get(url) != stale
+    print(f"✓ Stale-while-revalidate: expired entry served in {elapsed * 1e3:.2f} ms, refreshed in background")
+
+    handler.status = 503
+    server = make_threaded_server('127.0.0.1', 0, make_app(url, ttl=1), quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        _get(f'http://127.0.0.1:{server.server_port}/')
+        raise AssertionError("expected a 502")
+    except HTTPError as e:
+        assert e.code == 502
+    handler.status = 200
+    status, body = _get(f'http://127.0.0.1:{server.server_port}/')
+    assert status == 200 and b'External Status' in body
+    print("✓ Upstream 5xx -> 502 and not cached; next request fetches again")
+    server.shutdown()
+    stub.shutdown()
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _serve_app(pipe, kind, upstream, ttl, stale):
+    if kind == 'notebook':
+        server = make_server('127.0.0.1', 0, make_urlopen_app(upstream), handler_class=QuietHandler)
+    else:
+        server = make_threaded_server('127.0.0.1', 0, make_app(upstream, ttl, stale), quiet=True)
+    pipe.send(server.server_port)
+    server.serve_forever()
+
+
+def _serve_stub(pipe, delay):
+    server, base = start_stub(delay)
+    pipe.send(base)
+    threading.Event().wait()
+
+
+def _start(target, *args):
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=target, args=(child,) + args, daemon=True)
+    proc.start()
+    return proc, parent.recv()
+
+
+def _load(port, clients, requests_per_client):
+    latencies, errors = [], []
+
+    def client():
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            try:
+                conn.request('GET', '/')
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status != 200:
+                    raise http.client.HTTPException(resp.status)
+                latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                errors.append(1)
+            finally:
+                conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(latencies) / (time.perf_counter() - start), latencies, len(errors)
+
+
+def benchmark(clients, requests_per_client, delay, ttl, stale):
+    stub_proc, base = _start(_serve_stub, delay)
+    upstream = base + '/get'
+    print("=" * 88)
+    print(f"HELLO_AND_FETCH BENCHMARK: {clients} clients x {requests_per_client} requests, "
+          f"upstream delay {delay * 1e3:.0f} ms")
+    print("=" * 88)
+    print(f"{'app':<48} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'upstream':>9}")
+    print("-" * 88)
+    for label, kind, cache_ttl, n in [
+        ("simple_server + urlopen (notebook)", 'notebook', 0, max(1, requests_per_client // 10)),
+        ("threaded + pool, no cache", 'pooled', 0, requests_per_client),
+        (f"threaded + pool + cache (ttl {ttl}s, stale {stale}s)", 'pooled', ttl, requests_per_client),
+    ]:
+        before = json.loads(_get(base + '/stats')[1])['hits']
+        proc, port = _start(_serve_app, kind, upstream, cache_ttl, stale)
+        rps, lat, errors = _load(port, clients, n)
+        proc.terminate()
+        hits = json.loads(_get(base + '/stats')[1])['hits'] - before
+        print(f"{label:<48} {rps:>9,.0f} {_percentile(lat, 50) * 1e3:>8.1f} "
+              f"{_percentile(lat, 99) * 1e3:>8.1f} {errors:>7} {hits:>9,}")
+    stub_proc.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached, pooled hello_and_fetch")
+    parser.add_argument('mode', choices=['serve', 'stub', 'check', 'bench'])
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--upstream', default='http://httpbin.org/get')
+    parser.add_argument('--ttl', type=float, default=1.0)
+    parser.add_argument('--stale', type=float, default=30.0)
+    parser.add_argument('--delay', type=float, default=0.02, help="stub/bench: upstream delay (s)")
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200, help="bench: requests per client")
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        httpd = make_threaded_server('', args.port, make_app(args.upstream, args.ttl, args.stale))
+        print(f'we are live on port {args.port}...')
+        httpd.serve_forever()
+    elif args.mode == 'stub':
+        server, base = start_stub(args.delay, args.port)
+        print(f'stub upstream on {base} ({args.delay * 1e3:.0f} ms per request)')
+        threading.Event().wait()
+    elif args.mode == 'check':
+        check()
+    else:
+        benchmark(args.clients, args.requests, args.delay, args.ttl, args.stale)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Jagged / Sparse Utilities on CSR indptr
+File: jagged.py
+Purpose: O(nnz) vectorized versions of the 8.jagged.ipynb transforms
+
+The notebook's left_align_sparse loops over np.unique(rows) and builds a
+boolean mask over every non-zero for each row: O(rows x nnz). Everything
+here works on the CSR ``indptr`` array instead, where row r owns the
+slice ``indptr[r]:indptr[r + 1]``. The position of each non-zero inside
+its row is then one subtraction:
+
+    positions = np.arange(nnz) - np.repeat(indptr[:-1], np.diff(indptr))
+
+Functions:
+- row_lengths / row_ids / positions_in_row: the building blocks
+- left_align_sparse: shift each row's non-zeros to columns 0..k-1
+- index_to_binary: one-hot CSR matrix from class indices
+- multi_hot: multi-hot CSR matrix from jagged index lists
+- jagged_to_padded / padded_to_jagged: convert to and from a dense
+  padded 2-D array
+
+Run ``python jagged.py`` to check equivalence with the notebook versions
+and benchmark up to 10^7 non-zeros.
+"""
+
+import time
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+
+
+# ============================================================================
+# Building blocks
+# ============================================================================
+
+def row_lengths(indptr):
+    """Number of stored values in each row."""
+    return np.diff(indptr)
+
+
+def row_ids(indptr):
+    """
+    Row index of every stored value.
+
+    Example:
+        row_ids(np.array([0, 2, 3, 5]))  # array([0, 0, 1, 2, 2])
+    """
+    return np.repeat(np.arange(len(indptr) - 1, dtype=indptr.dtype), np.diff(indptr))
+
+
+def positions_in_row(indptr):
+    """
+    Position of every stored value inside its own row.
+
+    Example:
+        positions_in_row(np.array([0, 2, 3, 5]))  # array([0, 1, 0, 0, 1])
+    """
+    nnz = indptr[-1]
+    return np.arange(nnz, dtype=indptr.dtype) - np.repeat(indptr[:-1], np.diff(indptr))
+
+
+# ============================================================================
+# Transforms
+# ============================================================================
+
+def left_align_sparse(sparse_mtx):
+    """
+    Move each row's non-zeros to columns 0, 1, ..., k-1, keeping their order.
+
+    Args:
+        sparse_mtx: Any scipy sparse matrix (converted to canonical CSR)
+
+    Returns:
+        csr_matrix: Same shape, same data, left-aligned columns
+    """
+    # Copy: sum_duplicates() works in place, and the result would otherwise
+    # share data/indptr with a CSR input
+    csr = csr_matrix(sparse_mtx, copy=True)
+    csr.sum_duplicates()  # canonical: sorted columns, no duplicates
+    indptr = csr.indptr
+    return csr_matrix((csr.data, positions_in_row(indptr), indptr), shape=csr.shape)
+
+
+def index_to_binary(indices, num_classes):
+    """
+    One-hot CSR matrix with a 1 at (i, indices[i]).
+
+    Built directly in CSR form (one value per row, so indptr is
+    0, 1, ..., n) instead of going through COO and a sort.
+    """
+    indices = np.asarray(indices)
+    num_samples = len(indices)
+    indptr = np.arange(num_samples + 1, dtype=np.int64)
+    data = np.ones(num_samples)
+    return csr_matrix((data, indices, indptr), shape=(num_samples, num_classes))
+
+
+def multi_hot(indices, indptr, num_classes, dtype=np.float64):
+    """
+    Multi-hot CSR matrix: row r has a 1 in every column listed in
+    ``indices[indptr[r]:indptr[r + 1]]``. Repeated indices in a row are
+    counted once.
+    """
+    indices = np.asarray(indices)
+    indptr = np.asarray(indptr)
+    mtx = csr_matrix((np.ones(len(indices), dtype=dtype), indices, indptr),
+                     shape=(len(indptr) - 1, num_classes))
+    mtx.sum_duplicates()
+    mtx.data[:] = 1
+    return mtx
+
+
+def jagged_to_padded(values, indptr, pad_value=0, max_len=None):
+    """
+    Dense (rows, max_len) array from jagged rows, plus the validity mask.
+    Rows longer than ``max_len`` are truncated.
+    """
+    values = np.asarray(values)
+    indptr = np.asarray(indptr)
+    lengths = np.diff(indptr)
+    width = int(lengths.max(initial=0)) if max_len is None else max_len
+    positions = positions_in_row(indptr)
+    keep = positions < width
+    padded = np.full((len(lengths), width), pad_value, dtype=values.dtype)
+    padded[row_ids(indptr)[keep], positions[keep]] = values[keep]
+    mask = np.arange(width) < lengths[:, None]
+    return padded, mask
+
+
+def padded_to_jagged(padded, lengths):
+    """Inverse of jagged_to_padded: (values, indptr) from a padded array."""
+    lengths = np.asarray(lengths)
+    mask = np.arange(padded.shape[1]) < lengths[:, None]
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    return padded[mask], indptr
+
+
+# ============================================================================
+# Notebook reference versions (for equivalence checks)
+# ============================================================================
+
+def left_align_sparse_loop(sparse_mtx):
+    rows, cols = sparse_mtx.nonzero()
+    data = sparse_mtx.data
+
+    new_cols = np.zeros_like(cols)
+    for r in np.unique(rows):
+        mask = (rows == r)
+        new_cols[mask] = np.arange(np.sum(mask))
+
+    aligned = coo_matrix((data, (rows, new_cols)), shape=sparse_mtx.shape)
+    return aligned.tocsr()
+
+
+def index_to_binary_coo(indices, num_classes):
+    num_samples = len(indices)
+    rows = np.arange(num_samples)
+    cols = indices
+    data = np.ones(num_samples)
+
+    indicator = coo_matrix((data, (rows, cols)), shape=(num_samples, num_classes))
+    return indicator.tocsr()
+
+
+def _same(a, b):
+    return a.shape == b.shape and (a != b).nnz == 0
+
+
+def _random_csr(rows, cols, nnz, rng):
+    # Random distinct positions, stored without explicit zeros
+    flat = rng.choice(rows * cols, size=nnz, replace=False) if rows * cols < 10 * nnz \
+        else np.unique(rng.integers(0, rows * cols, size=nnz))
+    data = rng.random(len(flat)) + 0.5
+    return csr_matrix((data, (flat // cols, flat % cols)), shape=(rows, cols))
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    print("=" * 70)
+    print("EQUIVALENCE WITH THE NOTEBOOK FUNCTIONS")
+    print("=" * 70)
+    raw_data = np.array([[0, 5, 0, 8], [2, 0, 0, 0], [0, 0, 3, 1]])
+    sparse_in = csr_matrix(raw_data)
+    print("Left aligned:\n", left_align_sparse(sparse_in).toarray())
+    assert _same(left_align_sparse(sparse_in), left_align_sparse_loop(sparse_in))
+    for rows, cols, nnz in [(1, 1, 1), (50, 20, 300), (500, 1000, 20_000), (3000, 50, 40_000)]:
+        m = _random_csr(rows, cols, nnz, rng)
+        assert _same(left_align_sparse(m), left_align_sparse_loop(m))
+        assert _same(left_align_sparse(m.tocoo()), left_align_sparse_loop(m.tocsr()))
+        idx = rng.integers(0, cols, size=rows)
+        assert _same(index_to_binary(idx, cols), index_to_binary_coo(idx, cols))
+    empty = csr_matrix((4, 3))
+    assert _same(left_align_sparse(empty), left_align_sparse_loop(empty))
+
+    indptr = np.array([0, 2, 2, 5])
+    values = np.array([7, 8, 1, 2, 3])
+    padded, mask = jagged_to_padded(values, indptr, pad_value=-1)
+    back, back_ptr = padded_to_jagged(padded, mask.sum(1))
+    assert (back == values).all() and (back_ptr == indptr).all()
+    assert (multi_hot([1, 1, 2, 0], [0, 3, 4], 3).toarray() == [[0, 1, 1], [1, 0, 0]]).all()
+    print("✓ left_align_sparse, index_to_binary, multi_hot and padding round-trip match")
+
+    print("\n" + "=" * 70)
+    print("SCALING")
+    print("=" * 70)
+    print(f"{'nnz':>12} {'rows':>10} {'loop s':>10} {'vectorized s':>13} {'speedup':>9}")
+    print("-" * 58)
+    for nnz in [10**4, 10**5, 10**6, 10**7]:
+        rows = nnz // 10
+        m = _random_csr(rows, 1000, nnz, rng)
+        fast, t_fast = _timed(left_align_sparse, m)
+        if rows <= 10_000:
+            slow, t_slow = _timed(left_align_sparse_loop, m)
+            assert _same(fast, slow)
+            loop_col, speedup = f"{t_slow:10.3f}", f"{t_slow / t_fast:8.0f}x"
+        else:
+            # O(rows x nnz): ~10^10+ operations, not worth waiting for
+            loop_col, speedup = f"{'skipped':>10}", ""
+        print(f"{m.nnz:>12,} {rows:>10,} {loop_col} {t_fast:13.4f} {speedup:>9}")
+
+    print(f"\n{'samples':>12} {'coo s':>10} {'csr s':>10}")
+    for n in [10**5, 10**6, 10**7]:
+        idx = rng.integers(0, 100, size=n)
+        a, t_coo = _timed(index_to_binary_coo, idx, 100)
+        b, t_csr = _timed(index_to_binary, idx, 100)
+        assert _same(a, b)
+        print(f"{n:>12,} {t_coo:10.3f} {t_csr:10.4f}")